@@ -1,6 +1,27 @@
-from django.apps import AppConfig
+from django.apps import AppConfig, apps
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_migrate
 
 
 class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api'
+
+    def ready(self):
+        from api import db
+        from api.v1 import signals
+
+        connection_created.connect(db.apply_sqlite_pragmas)
+        # post_migrate is sent only to apps with models, the catalog ones
+        # are in reviews
+        post_migrate.connect(
+            signals.bump_all_catalog_versions,
+            sender=apps.get_app_config('reviews'),
+        )
+        post_migrate.connect(
+            signals.clear_cached_users, sender=apps.get_app_config('users')
+        )
+        post_migrate.connect(
+            signals.clear_throttle_buckets,
+            sender=apps.get_app_config('users'),
+        )
@@ -0,0 +1,226 @@
+import json
+import mmap
+import os
+import struct
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+
+# every process writes its own file of METRICS_DIR, so updates never wait
+# for other processes; the files are summed up when /metrics is read
+HEADER = struct.Struct('i')
+# entries start after the header padded to 8 bytes, so values are aligned
+DATA_START = 8
+KEY_LENGTH = struct.Struct('i')
+VALUE = struct.Struct('d')
+INITIAL_SIZE = 64 * 1024
+
+COUNTER = 'counter'
+GAUGE = 'gauge'
+HISTOGRAM = 'histogram'
+
+METRICS = {
+    'api_requests_total': (COUNTER, 'Количество запросов к API'),
+    'api_request_duration_seconds': (HISTOGRAM, 'Время обработки запроса'),
+    'api_db_queries_per_request': (HISTOGRAM, 'Количество SQL запросов'),
+    'api_db_duration_seconds': (HISTOGRAM, 'Время SQL запросов за запрос'),
+    'api_requests_in_flight': (GAUGE, 'Запросы в обработке'),
+    'api_catalog_cache_total': (COUNTER, 'Обращения к кэшу каталога'),
+    'api_throttled_requests_total': (COUNTER, 'Отклонённые запросы к /auth/'),
+    # calculated from api_catalog_cache_total when /metrics is read
+    'api_catalog_cache_hit_ratio': (GAUGE, 'Доля попаданий в кэш каталога'),
+}
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+class MetricsFile:
+    # [used size] then [key length][key, padded to 8 bytes][double] entries
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        if not os.path.exists(path):
+            with open(path, 'wb') as new_file:
+                new_file.write(
+                    HEADER.pack(DATA_START)
+                    + b'\0' * (INITIAL_SIZE - HEADER.size)
+                )
+        self.file = open(path, 'r+b')
+        self.map = mmap.mmap(self.file.fileno(), 0)
+        self.positions = {
+            key: position for key, position, _ in read_entries(self.map)
+        }
+
+    def add_key(self, key):
+        encoded = key.encode()
+        padded = len(encoded) + (-(KEY_LENGTH.size + len(encoded)) % 8)
+        used = HEADER.unpack_from(self.map, 0)[0]
+        end = used + KEY_LENGTH.size + padded + VALUE.size
+        if end > len(self.map):
+            size = len(self.map)
+            while size < end:
+                size *= 2
+            self.map.close()
+            self.file.truncate(size)
+            self.map = mmap.mmap(self.file.fileno(), 0)
+        start = used + KEY_LENGTH.size
+        key_end = start + len(encoded)
+        KEY_LENGTH.pack_into(self.map, used, len(encoded))
+        self.map[start:key_end] = encoded
+        position = end - VALUE.size
+        # the size is written last, so readers never see a half-added key
+        HEADER.pack_into(self.map, 0, end)
+        self.positions[key] = position
+        return position
+
+    def add(self, key, amount):
+        position = self.positions.get(key)
+        if position is None:
+            position = self.add_key(key)
+        value = VALUE.unpack_from(self.map, position)[0]
+        VALUE.pack_into(self.map, position, value + amount)
+
+
+def read_entries(data):
+    used = HEADER.unpack_from(data, 0)[0]
+    position = DATA_START
+    while position < used:
+        length = KEY_LENGTH.unpack_from(data, position)[0]
+        start = position + KEY_LENGTH.size
+        end = start + length
+        key = bytes(data[start:end]).decode()
+        position = start + length + (-(KEY_LENGTH.size + length) % 8)
+        yield key, position, VALUE.unpack_from(data, position)[0]
+        position += VALUE.size
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    global _store
+    if not settings.METRICS_ENABLED:
+        return None
+    path = os.path.join(settings.METRICS_DIR, f'{os.getpid()}.db')
+    # a forked worker must not share the file of its parent
+    if _store is None or _store.path != path:
+        with _store_lock:
+            if _store is None or _store.path != path:
+                os.makedirs(settings.METRICS_DIR, exist_ok=True)
+                _store = MetricsFile(path)
+    return _store
+
+
+def get_key(name, labels):
+    return json.dumps([name, sorted(labels.items())], ensure_ascii=False)
+
+
+def inc(name, amount=1, **labels):
+    store = get_store()
+    if store is None:
+        return
+    with store.lock:
+        store.add(get_key(name, labels), amount)
+
+
+def observe(name, value, buckets, **labels):
+    store = get_store()
+    if store is None:
+        return
+    with store.lock:
+        for bound in buckets:
+            # empty buckets are written too, every series has all bounds
+            store.add(
+                get_key(f'{name}_bucket', {**labels, 'le': bound}),
+                int(value <= bound),
+            )
+        store.add(get_key(f'{name}_bucket', {**labels, 'le': '+Inf'}), 1)
+        store.add(get_key(f'{name}_sum', labels), value)
+        store.add(get_key(f'{name}_count', labels), 1)
+
+
+def is_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def collect(directory=None):
+    directory = directory or settings.METRICS_DIR
+    values = defaultdict(float)
+    if not os.path.isdir(directory):
+        return values
+    for f_name in os.listdir(directory):
+        pid, extension = os.path.splitext(f_name)
+        if extension != '.db':
+            continue
+        alive = pid.isdigit() and is_alive(int(pid))
+        with open(os.path.join(directory, f_name), 'rb') as metrics_file:
+            data = metrics_file.read()
+        for key, _, value in read_entries(data):
+            name, labels = json.loads(key)
+            # gauges of finished processes are stale, counters are kept
+            if METRICS.get(name, (None,))[0] == GAUGE and not alive:
+                continue
+            values[name, tuple(map(tuple, labels))] += value
+    return values
+
+
+def format_labels(labels):
+    if not labels:
+        return ''
+    pairs = ','.join(
+        '{}="{}"'.format(name, str(value).replace('"', '\\"'))
+        for name, value in labels
+    )
+    return f'{{{pairs}}}'
+
+
+def get_family(name):
+    for suffix in ('_bucket', '_sum', '_count'):
+        if name.endswith(suffix) and name[: -len(suffix)] in METRICS:
+            return name[: -len(suffix)]
+    return name
+
+
+def add_cache_hit_ratio(values):
+    totals = defaultdict(float)
+    for (name, labels), value in values.items():
+        if name == 'api_catalog_cache_total':
+            totals[dict(labels)['result']] += value
+    requests = totals['hit'] + totals['miss']
+    if requests:
+        values['api_catalog_cache_hit_ratio', ()] = totals['hit'] / requests
+
+
+def render(directory=None):
+    values = collect(directory)
+    add_cache_hit_ratio(values)
+    families = defaultdict(list)
+    for (name, labels), value in sorted(values.items(), key=sort_key):
+        families[get_family(name)].append(
+            f'{name}{format_labels(labels)} {value!r}'
+        )
+    lines = []
+    for family, samples in families.items():
+        kind, description = METRICS[family]
+        lines.append(f'# HELP {family} {description}')
+        lines.append(f'# TYPE {family} {kind}')
+        lines.extend(samples)
+    return '\n'.join(lines) + '\n'
+
+
+def sort_key(item):
+    (name, labels), _ = item
+    # buckets are listed by their numeric bound, `+Inf` goes last
+    return name, [
+        (label, float(value) if label == 'le' else 0, str(value))
+        for label, value in labels
+    ]
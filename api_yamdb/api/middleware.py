@@ -0,0 +1,143 @@
+import json
+import logging
+import random
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.contrib.auth import middleware as auth
+from django.contrib.messages import middleware as messages
+from django.contrib.sessions import middleware as sessions
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.middleware import clickjacking, csrf
+
+from api import metrics, timing
+
+logger = logging.getLogger('api.timing')
+
+
+class RequestTimingMiddleware:
+    # SQL, serializer and auth time of sampled requests in the
+    # `Server-Timing` header and a json log line
+    def __init__(self, get_response):
+        if not settings.REQUEST_TIMING_ENABLED:
+            # removed from the middleware chain, no per-request cost
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.sample_rate = settings.REQUEST_TIMING_SAMPLE_RATE
+
+    def __call__(self, request):
+        if random.random() >= self.sample_rate:
+            return self.get_response(request)
+        timings = timing.RequestTimings()
+        token = timing.current.set(timings)
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(timings))
+                response = self.get_response(request)
+        finally:
+            timing.current.reset(token)
+        timings.finish()
+        response['Server-Timing'] = timings.as_header()
+        match = request.resolver_match
+        logger.info(
+            json.dumps(
+                {
+                    'method': request.method,
+                    'path': request.path,
+                    'view': match.view_name if match else None,
+                    'status': response.status_code,
+                    **timings.as_dict(),
+                }
+            )
+        )
+        return response
+
+
+class MetricsMiddleware:
+    # request, latency and query metrics per route for /metrics
+    def __init__(self, get_response):
+        if not settings.METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        queries = timing.RequestTimings()
+        metrics.inc('api_requests_in_flight')
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(queries))
+                response = self.get_response(request)
+        finally:
+            metrics.inc('api_requests_in_flight', -1)
+        match = request.resolver_match
+        route = match.view_name if match else 'unmatched'
+        metrics.inc(
+            'api_requests_total',
+            route=route,
+            method=request.method,
+            status=response.status_code,
+        )
+        metrics.observe(
+            'api_request_duration_seconds',
+            time.perf_counter() - started,
+            metrics.DURATION_BUCKETS,
+            route=route,
+            method=request.method,
+        )
+        metrics.observe(
+            'api_db_queries_per_request',
+            queries.queries,
+            metrics.QUERY_BUCKETS,
+            route=route,
+        )
+        metrics.observe(
+            'api_db_duration_seconds',
+            queries.durations['db'],
+            metrics.DURATION_BUCKETS,
+            route=route,
+        )
+        return response
+
+
+def is_api_request(request):
+    return request.path_info.startswith(settings.API_PATH_PREFIX)
+
+
+class SkipForApiMixin:
+    # the API authenticates with JWT only, so sessions, CSRF, messages and
+    # frame options run for the admin and other html pages only; the
+    # classes stay subclasses of the Django ones for the admin checks
+    def __call__(self, request):
+        if is_api_request(request):
+            return self.get_response(request)
+        return super().__call__(request)
+
+
+class SessionMiddleware(SkipForApiMixin, sessions.SessionMiddleware):
+    pass
+
+
+class CsrfViewMiddleware(SkipForApiMixin, csrf.CsrfViewMiddleware):
+    def process_view(self, request, *args, **kwargs):
+        if is_api_request(request):
+            return None
+        return super().process_view(request, *args, **kwargs)
+
+
+class AuthenticationMiddleware(SkipForApiMixin, auth.AuthenticationMiddleware):
+    pass
+
+
+class MessageMiddleware(SkipForApiMixin, messages.MessageMiddleware):
+    pass
+
+
+class XFrameOptionsMiddleware(
+    SkipForApiMixin, clickjacking.XFrameOptionsMiddleware
+):
+    pass
@@ -0,0 +1,78 @@
+import time
+from collections import Counter
+from contextvars import ContextVar
+
+# timings of the sampled request being handled, None when it isn't sampled
+current = ContextVar('request_timings', default=None)
+
+
+class RequestTimings:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.total = None
+        self.queries = 0
+        self.durations = Counter(db=0)
+        self.depth = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        # connection.execute_wrapper() hook
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.durations['db'] += time.perf_counter() - started
+            self.queries += 1
+
+    def finish(self):
+        self.total = time.perf_counter() - self.started
+
+    def as_header(self):
+        db_time = self.durations['db'] * 1000
+        metrics = [f'db;dur={db_time:.2f};desc="{self.queries} queries"']
+        metrics.extend(
+            f'{name};dur={duration * 1000:.2f}'
+            for name, duration in self.durations.items()
+            if name != 'db'
+        )
+        metrics.append(f'total;dur={self.total * 1000:.2f}')
+        return ', '.join(metrics)
+
+    def as_dict(self):
+        data = {
+            f'{name}_ms': round(duration * 1000, 2)
+            for name, duration in self.durations.items()
+        }
+        data.update(queries=self.queries, total_ms=round(self.total * 1000, 2))
+        return data
+
+
+def is_measured(name):
+    # False outside sampled requests and inside a block of the same name,
+    # so hot paths can skip `measure` without building anything
+    timings = current.get()
+    return timings is not None and not timings.depth[name]
+
+
+class measure:
+    # only the outermost block of a name is counted, so nested serializers
+    # don't add their time twice
+    __slots__ = ('name', 'timings', 'started')
+
+    def __init__(self, name):
+        self.name = name
+        self.timings = None
+
+    def __enter__(self):
+        timings = current.get()
+        if timings is None or timings.depth[self.name]:
+            return
+        timings.depth[self.name] += 1
+        self.timings = timings
+        self.started = time.perf_counter()
+
+    def __exit__(self, *exc_info):
+        timings = self.timings
+        if timings is None:
+            return
+        timings.durations[self.name] += time.perf_counter() - self.started
+        timings.depth[self.name] -= 1
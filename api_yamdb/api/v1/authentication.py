@@ -0,0 +1,181 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.utils.functional import SimpleLazyObject, empty
+from rest_framework_simplejwt import tokens
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+
+from api import timing
+
+
+class UserCache:
+    # per-process LRU of user rows with a short TTL; changes made in
+    # this process invalidate entries at once, other processes pick them
+    # up when the TTL ends
+    def __init__(self):
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get_entry(self, user_id):
+        with self.lock:
+            entry = self.entries.get(user_id)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del self.entries[user_id]
+                return None
+            self.entries.move_to_end(user_id)
+            return entry
+
+    def get(self, model, user_id):
+        entry = self.get_entry(user_id)
+        if entry is None:
+            return None
+        _, db, field_names, values = entry
+        # a fresh instance for every request, so views can't change the
+        # cached one
+        return model.from_db(db, field_names, values)
+
+    def get_values(self, user_id, names):
+        entry = self.get_entry(user_id)
+        if entry is None:
+            return None
+        _, _, field_names, values = entry
+        return tuple(values[field_names.index(name)] for name in names)
+
+    def set(self, user_id, user):
+        timeout = settings.USER_CACHE_TIMEOUT
+        if timeout <= 0:
+            return
+        field_names = [field.attname for field in user._meta.concrete_fields]
+        entry = (
+            time.monotonic() + timeout,
+            user._state.db,
+            field_names,
+            [getattr(user, name) for name in field_names],
+        )
+        with self.lock:
+            self.entries[user_id] = entry
+            self.entries.move_to_end(user_id)
+            while len(self.entries) > settings.USER_CACHE_SIZE:
+                self.entries.popitem(last=False)
+
+    def delete(self, user_id):
+        with self.lock:
+            self.entries.pop(user_id, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+user_cache = UserCache()
+
+ROLE_CLAIM = 'role'
+SUPERUSER_CLAIM = 'is_superuser'
+TOKEN_VERSION_CLAIM = 'token_version'
+TOKEN_CLAIMS = (TOKEN_VERSION_CLAIM, ROLE_CLAIM, SUPERUSER_CLAIM)
+# user fields that must match TOKEN_CLAIMS
+TOKEN_FIELDS = ('token_version', 'role', 'is_superuser')
+
+
+class AccessToken(tokens.AccessToken):
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        token[ROLE_CLAIM] = user.role
+        token[SUPERUSER_CLAIM] = user.is_superuser
+        token[TOKEN_VERSION_CLAIM] = user.token_version
+        return token
+
+
+class TokenUser(SimpleLazyObject):
+    # answers the permission checks from the signed claims of the token,
+    # the user row is loaded only when a view needs its other fields
+    is_authenticated = True
+    is_anonymous = False
+
+    def __init__(self, token, load_user):
+        self.__dict__['token'] = token
+        super().__init__(load_user)
+
+    def get_claim(self, name, claim):
+        # fields set by a view win over the claims
+        if self._wrapped is not empty:
+            return getattr(self._wrapped, name)
+        return self.token[claim]
+
+    @property
+    def id(self):
+        return self.get_claim('id', api_settings.USER_ID_CLAIM)
+
+    pk = id
+
+    @property
+    def role(self):
+        return self.get_claim('role', ROLE_CLAIM)
+
+    @property
+    def is_superuser(self):
+        return self.get_claim('is_superuser', SUPERUSER_CLAIM)
+
+    @property
+    def is_admin(self):
+        return self.role == get_user_model().ADMIN or self.is_superuser
+
+    @property
+    def is_moderator(self):
+        return self.role == get_user_model().MODERATOR
+
+
+class TimedJWTAuthentication(JWTAuthentication):
+    def authenticate(self, request):
+        with timing.measure('auth'):
+            return super().authenticate(request)
+
+
+class CachedJWTAuthentication(TimedJWTAuthentication):
+    # serves the user of a valid token from `user_cache` instead of a query;
+    # for tokens with role claims only the claims are checked against the
+    # cached row and the user is loaded lazily
+    def get_user(self, validated_token):
+        if TOKEN_VERSION_CLAIM not in validated_token:
+            # tokens issued without the role claims
+            return self.load_user(validated_token)
+        user = None
+        # only active users are cached, changes of a user drop its entry
+        state = user_cache.get_values(
+            validated_token.get(api_settings.USER_ID_CLAIM), TOKEN_FIELDS
+        )
+        if state is None:
+            user = self.load_user(validated_token)
+            state = tuple(getattr(user, name) for name in TOKEN_FIELDS)
+        # bulk updates such as `loadcsv --mode=upsert` change roles without
+        # bumping the version, so the claims are compared too
+        claims = tuple(validated_token.get(claim) for claim in TOKEN_CLAIMS)
+        if state != claims:
+            raise AuthenticationFailed(
+                'Токен отозван после изменения роли пользователя',
+                code='token_revoked',
+            )
+        if user is not None:
+            return user
+        return TokenUser(
+            validated_token, lambda: self.load_user(validated_token)
+        )
+
+    def load_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        user = None
+        if user_id is not None:
+            user = user_cache.get(self.user_model, user_id)
+        if user is None:
+            # validates the claim and the user, only active users are cached
+            user = super().get_user(validated_token)
+            user_cache.set(user_id, user)
+        return user
@@ -0,0 +1,93 @@
+import hashlib
+import time
+import uuid
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import caches
+
+from api import metrics
+
+VERSION_KEY = 'catalog:version:{}'
+RESPONSE_KEY = 'catalog:response:{}'
+CHANGED_KEY = 'catalog:changed:{}'
+
+stats = Counter(hit=0, miss=0)
+
+
+def get_cache():
+    return caches[settings.CATALOG_CACHE_ALIAS]
+
+
+def get_version_key(model):
+    return VERSION_KEY.format(model._meta.label_lower)
+
+
+def new_version():
+    # unique for every bump: a backend without an atomic incr (e.g.
+    # FileBasedCache) can't give two concurrent bumps the same version, and
+    # a version that was evicted is never repeated
+    return uuid.uuid4().hex
+
+
+def get_versions(models):
+    if not models:
+        return []
+    cache = get_cache()
+    keys = [get_version_key(model) for model in models]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, new_version(), timeout=None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def bump_version(model):
+    get_cache().set(get_version_key(model), new_version(), timeout=None)
+    mark_changed(model)
+
+
+def mark_changed(model):
+    # deletes and changes of related models don't move Max(updated_at),
+    # their time is kept for `Last-Modified`
+    get_cache().set(
+        CHANGED_KEY.format(model._meta.label_lower), time.time(), timeout=None
+    )
+
+
+def get_changed(models):
+    # the last time any of `models` changed; a time that was never recorded
+    # or got evicted is taken as now, so validators built before a lost
+    # change can't match again
+    cache = get_cache()
+    keys = [CHANGED_KEY.format(model._meta.label_lower) for model in models]
+    changed = cache.get_many(keys)
+    for key in keys:
+        if key not in changed:
+            now = time.time()
+            cache.add(key, now, timeout=None)
+            changed[key] = cache.get(key) or now
+    return max(changed.values())
+
+
+def get_response_key(request, versions):
+    # the pagination links of cached bodies are absolute, so the scheme
+    # and the host are part of the key
+    versions = ':'.join(str(version) for version in versions)
+    digest = hashlib.md5(
+        f'{request.build_absolute_uri()}|{versions}'.encode()
+    ).hexdigest()
+    return RESPONSE_KEY.format(digest)
+
+
+def get_response(key):
+    cached = get_cache().get(key)
+    result = 'miss' if cached is None else 'hit'
+    stats[result] += 1
+    metrics.inc('api_catalog_cache_total', result=result)
+    return cached
+
+
+def set_response(key, data):
+    get_cache().set(key, data, timeout=settings.CATALOG_CACHE_TIMEOUT)
@@ -1,12 +1,17 @@
 from django_filters.rest_framework import CharFilter, FilterSet
 
 from reviews.models import Title
+from reviews.search import search_titles
 
 
 class TitleFilter(FilterSet):
     genre = CharFilter(field_name='genre__slug')
     category = CharFilter(field_name='category__slug')
+    search = CharFilter(method='filter_search')
 
     class Meta:
         model = Title
         fields = ['name', 'year', 'genre', 'category']
+
+    def filter_search(self, queryset, name, value):
+        return search_titles(queryset, value)
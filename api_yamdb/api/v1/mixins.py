@@ -1,3 +1,9 @@
+import hashlib
+
+from django.conf import settings
+from django.db.models import Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
 from rest_framework import status
 from rest_framework.mixins import (
     CreateModelMixin,
@@ -7,16 +13,132 @@ from rest_framework.mixins import (
 from rest_framework.response import Response
 from rest_framework.viewsets import GenericViewSet, ModelViewSet
 
+from api import timing
+from api.v1 import cache
+
+
+class ConditionalCacheMixin:
+    # models whose changes invalidate cached responses and ETags,
+    # anonymous responses are cached only when it is set
+    cache_models = ()
+    # timestamp of the rows for `Last-Modified` and ETags
+    last_modified_field = None
+
+    def use_response_cache(self, request):
+        return (
+            bool(self.cache_models)
+            and settings.CATALOG_CACHE_ENABLED
+            and not request.user.is_authenticated
+        )
+
+    def get_validators(self, queryset, versions):
+        parts = [self.request.build_absolute_uri(), *versions]
+        last_modified = None
+        if self.last_modified_field:
+            # a MAX over an indexed column, no COUNT of the whole queryset:
+            # deletes and changes of related models don't move it, the time
+            # of their last change comes from the catalog cache
+            modified = queryset.order_by().aggregate(
+                modified=Max(self.last_modified_field)
+            )['modified']
+            changed = cache.get_changed((*self.cache_models, queryset.model))
+            if modified is not None:
+                changed = max(changed, modified.timestamp())
+            last_modified = int(changed)
+            parts.extend((modified, changed))
+        elif not versions:
+            return None, None
+        digest = hashlib.md5('|'.join(map(str, parts)).encode()).hexdigest()
+        return quote_etag(digest), last_modified
+
+    def get_conditional_response(
+        self, queryset, handler, request, *args, **kwargs
+    ):
+        versions = cache.get_versions(self.cache_models)
+        key = cached = None
+        if self.use_response_cache(request):
+            key = cache.get_response_key(request, versions)
+            cached = cache.get_response(key)
+        if cached is not None:
+            data, etag, last_modified = cached
+        else:
+            etag, last_modified = self.get_validators(queryset, versions)
+        response = None
+        if etag is not None:
+            # 304 is decided before any row is fetched or serialized
+            response = get_conditional_response(
+                request, etag=etag, last_modified=last_modified
+            )
+        if response is None and cached is not None:
+            response = Response(data)
+        elif response is None:
+            response = handler(request, *args, **kwargs)
+            if key and response.status_code == status.HTTP_200_OK:
+                cache.set_response(key, (response.data, etag, last_modified))
+        if etag is not None and response.status_code in (
+            status.HTTP_200_OK,
+            status.HTTP_304_NOT_MODIFIED,
+        ):
+            response['ETag'] = etag
+            if last_modified is not None:
+                response['Last-Modified'] = http_date(last_modified)
+        return response
+
+
+class CachedListMixin(ConditionalCacheMixin):
+    def list(self, request, *args, **kwargs):
+        return self.get_conditional_response(
+            self.filter_queryset(self.get_queryset()),
+            super().list,
+            request,
+            *args,
+            **kwargs,
+        )
+
+
+class CachedRetrieveMixin(ConditionalCacheMixin):
+    # kept apart from the list one: the router exposes detail routes for
+    # every viewset that has a `retrieve` attribute
+    def retrieve(self, request, *args, **kwargs):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        queryset = self.filter_queryset(self.get_queryset()).filter(
+            **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+        )
+        return self.get_conditional_response(
+            queryset, super().retrieve, request, *args, **kwargs
+        )
+
 
 class CreateListDeleteViewSet(
-    GenericViewSet, CreateModelMixin, ListModelMixin, DestroyModelMixin
+    CachedListMixin,
+    GenericViewSet,
+    CreateModelMixin,
+    ListModelMixin,
+    DestroyModelMixin,
 ):
     pass
 
 
-class DenyPutViewSet(ModelViewSet):
+class DenyPutViewSet(CachedListMixin, CachedRetrieveMixin, ModelViewSet):
     def update(self, request, *args, **kwargs):
         partial = kwargs.get('partial', False)
         if not partial:
             return Response(status=status.HTTP_405_METHOD_NOT_ALLOWED)
         return super().update(request, *args, **kwargs)
+
+
+class TimedSerializerMixin:
+    # serializer time of sampled requests, it includes the queries run by
+    # validation and related fields; nested and unsampled calls go straight
+    # to the serializer
+    def run_validation(self, *args, **kwargs):
+        if not timing.is_measured('serializer'):
+            return super().run_validation(*args, **kwargs)
+        with timing.measure('serializer'):
+            return super().run_validation(*args, **kwargs)
+
+    def to_representation(self, instance):
+        if not timing.is_measured('serializer'):
+            return super().to_representation(instance)
+        with timing.measure('serializer'):
+            return super().to_representation(instance)
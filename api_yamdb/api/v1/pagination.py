@@ -0,0 +1,46 @@
+from rest_framework.pagination import CursorPagination, LimitOffsetPagination
+
+
+class KeysetPagination(CursorPagination):
+    page_size_query_param = 'limit'
+
+
+class LimitOffsetOrCursorPagination(LimitOffsetPagination):
+    # clients opt in to keyset pagination with `?pagination=cursor` and then
+    # follow the opaque `next`/`previous` links: every cursor page costs the
+    # same and no COUNT(*) is issued
+    mode_query_param = 'pagination'
+    cursor_mode = 'cursor'
+    cursor_ordering = None
+
+    def use_cursor(self, request):
+        return self.cursor_ordering is not None and (
+            request.query_params.get(self.mode_query_param) == self.cursor_mode
+            or KeysetPagination.cursor_query_param in request.query_params
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        if self.use_cursor(request):
+            self.keyset = KeysetPagination()
+            self.keyset.ordering = self.cursor_ordering
+            return self.keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+    def get_html_context(self):
+        if self.keyset is not None:
+            return self.keyset.get_html_context()
+        return super().get_html_context()
+
+
+class TitlePagination(LimitOffsetOrCursorPagination):
+    cursor_ordering = ('name', 'id')
+
+
+class PublicationPagination(LimitOffsetOrCursorPagination):
+    cursor_ordering = ('pub_date', 'id')
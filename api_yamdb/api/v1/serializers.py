@@ -2,14 +2,20 @@ import datetime as dt
 
 from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.db import IntegrityError, transaction
+from django.db.models import Q
 from rest_framework import serializers
 
+from api.v1.mixins import TimedSerializerMixin
 from reviews.models import Category, Comment, Genre, Review, Title
 
 User = get_user_model()
 
 
 class ValidateUserSerializer:
+    # user with exactly the validated attrs, e.g. a repeated signup
+    registered_user = None
+
     def validate(self, attrs):
         username = attrs.get('username')
         email = attrs.get('email')
@@ -17,29 +23,42 @@ class ValidateUserSerializer:
             raise serializers.ValidationError(
                 'Пользователь me не может быть создан и изменен'
             )
-        # second condition hanldes case, when we validate the already
-        # created user with the same attrs - when he should get only
-        # confirmation
-        # without it test failed with:
-        # Проверьте, что повторный POST-запрос к `/api/v1/auth/signup/`
-        # с данными зарегистрированного пользователя возвращает ответ
-        # со статусом 200
-        if (
-            User.objects.filter(username=username).exists()
-            and not User.objects.filter(**attrs).exists()
-        ):
+        lookup = Q()
+        if username:
+            lookup |= Q(username=username)
+        if email:
+            lookup |= Q(email=email)
+        if not lookup:
+            return attrs
+        # both fields are unique, so one query returns every conflict
+        users = list(User.objects.filter(lookup))
+        # the already created user with the same attrs should get only
+        # a confirmation, so the conflicts are checked against it
+        self.registered_user = next(
+            (
+                user
+                for user in users
+                if all(
+                    getattr(user, field) == value
+                    for field, value in attrs.items()
+                )
+            ),
+            None,
+        )
+        if self.registered_user is not None:
+            return attrs
+        if any(user.username == username for user in users):
             raise serializers.ValidationError('Пользователь уже существует')
-        if (
-            User.objects.filter(email=email).exists()
-            and not User.objects.filter(**attrs).exists()
-        ):
+        if any(user.email == email for user in users):
             raise serializers.ValidationError(
                 'Пользователь с такой почтой уже существует'
             )
         return attrs
 
 
-class UserSerializer(ValidateUserSerializer, serializers.ModelSerializer):
+class UserSerializer(
+    ValidateUserSerializer, TimedSerializerMixin, serializers.ModelSerializer
+):
     class Meta:
         model = User
         fields = (
@@ -52,7 +71,7 @@ class UserSerializer(ValidateUserSerializer, serializers.ModelSerializer):
         )
 
 
-class TokenSerializer(serializers.Serializer):
+class TokenSerializer(TimedSerializerMixin, serializers.Serializer):
     username = serializers.CharField()
     confirmation_code = serializers.CharField()
 
@@ -61,7 +80,9 @@ class TokenSerializer(serializers.Serializer):
         fields = ('confirmation_code', 'username')
 
 
-class RegisterSerializer(ValidateUserSerializer, serializers.ModelSerializer):
+class RegisterSerializer(
+    ValidateUserSerializer, TimedSerializerMixin, serializers.ModelSerializer
+):
     username = serializers.RegexField(
         regex=r'^[\w.@+-]+$',
         required=True,
@@ -77,29 +98,37 @@ class RegisterSerializer(ValidateUserSerializer, serializers.ModelSerializer):
         fields = ('username', 'email')
 
 
-class GenreSerializer(serializers.ModelSerializer):
+class GenreSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Genre
         exclude = ('id',)
 
 
-class CategorySerializer(serializers.ModelSerializer):
+class CategorySerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Category
         exclude = ('id',)
 
 
-class TitleReadSerializer(serializers.ModelSerializer):
+class TitleReadSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     category = CategorySerializer(read_only=True)
     genre = GenreSerializer(read_only=True, many=True)
     rating = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = Title
-        fields = '__all__'
+        fields = (
+            'id',
+            'name',
+            'year',
+            'rating',
+            'description',
+            'genre',
+            'category',
+        )
 
 
-class TitleWriteSerializer(serializers.ModelSerializer):
+class TitleWriteSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     category = serializers.SlugRelatedField(
         slug_field='slug', queryset=Category.objects.all(), required=True
     )
@@ -112,7 +141,7 @@ class TitleWriteSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Title
-        fields = '__all__'
+        fields = ('id', 'name', 'year', 'description', 'genre', 'category')
 
     def validate_year(self, value):
         if value > dt.date.today().year:
@@ -124,24 +153,24 @@ class TitleWriteSerializer(serializers.ModelSerializer):
         return value
 
 
-class CommentSerializer(serializers.ModelSerializer):
+class CommentSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     author = serializers.SlugRelatedField(
         slug_field='username', read_only=True
     )
 
     class Meta:
-        exclude = ('review',)
+        exclude = ('review', 'updated_at')
         read_only_fields = ('id', 'review', 'pub_date')
         model = Comment
 
 
-class ReviewSerializer(serializers.ModelSerializer):
+class ReviewSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     author = serializers.SlugRelatedField(
         slug_field='username', read_only=True
     )
 
     class Meta:
-        exclude = ('title',)
+        exclude = ('title', 'updated_at')
         read_only_fields = ('id', 'title', 'pub_date')
         model = Review
 
@@ -150,9 +179,13 @@ class ReviewSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError('Оценка по 10-бальной шкале')
         return value
 
-    @staticmethod
-    def check_only_one_review(review):
-        if review:
+    def save(self, **kwargs):
+        # rely on the `unique review` constraint instead of a pre-check
+        # query, the savepoint keeps an outer transaction usable
+        try:
+            with transaction.atomic():
+                return super().save(**kwargs)
+        except IntegrityError:
             raise serializers.ValidationError(
                 'Может оставить только один отзыв'
             )
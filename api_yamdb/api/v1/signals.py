@@ -0,0 +1,61 @@
+from functools import partial
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from rest_framework_simplejwt.settings import api_settings
+
+from api.v1 import cache, throttling
+from api.v1.authentication import user_cache
+from reviews.models import Category, Comment, Genre, GenreTitle, Review, Title
+
+User = get_user_model()
+
+CATALOG_MODELS = (Title, Genre, Category, GenreTitle, Review)
+
+
+def bump_catalog_version(sender, **kwargs):
+    # after the commit: a version bumped earlier could be read by another
+    # worker that still sees the old rows and caches them under it
+    transaction.on_commit(partial(cache.bump_version, sender))
+
+
+for model in CATALOG_MODELS:
+    post_save.connect(bump_catalog_version, sender=model)
+    post_delete.connect(bump_catalog_version, sender=model)
+# title genres are saved through `Title.genre.set()`, which bulk inserts
+# GenreTitle rows without post_save
+m2m_changed.connect(bump_catalog_version, sender=GenreTitle)
+
+
+def mark_comment_deleted(sender, **kwargs):
+    # comments have no version, but a delete must change `Last-Modified`
+    transaction.on_commit(partial(cache.mark_changed, sender))
+
+
+post_delete.connect(mark_comment_deleted, sender=Comment)
+
+
+def bump_all_catalog_versions(sender, **kwargs):
+    # flush truncates tables without model signals and ends with
+    # post_migrate, so cached responses must not outlive it
+    for model in CATALOG_MODELS:
+        cache.bump_version(model)
+
+
+def invalidate_cached_user(sender, instance, **kwargs):
+    # role, is_active and profile changes are seen by the next request
+    user_cache.delete(getattr(instance, api_settings.USER_ID_FIELD))
+
+
+post_save.connect(invalidate_cached_user, sender=User)
+post_delete.connect(invalidate_cached_user, sender=User)
+
+
+def clear_cached_users(sender, **kwargs):
+    # flush may reuse the ids of deleted users
+    user_cache.clear()
+
+
+def clear_throttle_buckets(sender, **kwargs):
+    throttling.clear_stores()
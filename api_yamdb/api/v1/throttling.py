@@ -0,0 +1,208 @@
+import hashlib
+import math
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.throttling import SimpleRateThrottle
+
+from api import metrics
+
+# the stores forget full buckets: they are evicted from memory, expire in
+# the cache and are pruned from sqlite
+SQLITE_PRUNE_EVERY = 1000
+
+
+def take_token(bucket, now, capacity, rate):
+    # returns the tokens left and the seconds to wait, 0 if a token was
+    # taken; `rate` is tokens per second
+    if bucket is None:
+        tokens = capacity
+    else:
+        tokens, updated = bucket
+        tokens = min(capacity, tokens + (now - updated) * rate)
+    if tokens >= 1:
+        return tokens - 1, 0
+    return tokens, (1 - tokens) / rate
+
+
+class MemoryBucketStore:
+    # buckets of this process only
+    def __init__(self, size):
+        self.size = size
+        self.buckets = OrderedDict()
+        self.lock = threading.Lock()
+
+    def take(self, key, capacity, rate):
+        now = time.time()
+        with self.lock:
+            tokens, wait = take_token(
+                self.buckets.get(key), now, capacity, rate
+            )
+            self.buckets[key] = (tokens, now)
+            self.buckets.move_to_end(key)
+            if len(self.buckets) > self.size:
+                self.buckets.popitem(last=False)
+        return wait
+
+    def clear(self):
+        with self.lock:
+            self.buckets.clear()
+
+
+class SqliteBucketStore:
+    # a local file shared by the processes of the server
+    def __init__(self, path):
+        self.path = str(path)
+        self.local = threading.local()
+        self.takes = 0
+
+    def get_connection(self):
+        connection = getattr(self.local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(
+                self.path, timeout=5, isolation_level=None
+            )
+            connection.execute('PRAGMA journal_mode = WAL')
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS throttle_bucket ('
+                'key TEXT PRIMARY KEY, tokens REAL NOT NULL, '
+                'updated REAL NOT NULL, full_at REAL NOT NULL'
+                ') WITHOUT ROWID'
+            )
+            self.local.connection = connection
+        return connection
+
+    def take(self, key, capacity, rate):
+        connection = self.get_connection()
+        now = time.time()
+        # the write lock is taken before reading, so two processes can't
+        # both spend the last token
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            bucket = connection.execute(
+                'SELECT tokens, updated FROM throttle_bucket WHERE key = ?',
+                (key,),
+            ).fetchone()
+            tokens, wait = take_token(bucket, now, capacity, rate)
+            connection.execute(
+                'INSERT OR REPLACE INTO throttle_bucket VALUES (?, ?, ?, ?)',
+                (key, tokens, now, now + (capacity - tokens) / rate),
+            )
+            self.takes += 1
+            if self.takes % SQLITE_PRUNE_EVERY == 0:
+                connection.execute(
+                    'DELETE FROM throttle_bucket WHERE full_at < ?', (now,)
+                )
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        connection.execute('COMMIT')
+        return wait
+
+    def clear(self):
+        self.get_connection().execute('DELETE FROM throttle_bucket')
+
+
+class CacheBucketStore:
+    # a Django cache, e.g. a Redis-compatible one shared by the servers;
+    # reading and writing a bucket is not atomic, so concurrent requests
+    # may get a few tokens more than the rate
+    def __init__(self, alias):
+        self.alias = alias
+
+    def take(self, key, capacity, rate):
+        cache = caches[self.alias]
+        now = time.time()
+        tokens, wait = take_token(cache.get(key), now, capacity, rate)
+        cache.set(
+            key,
+            (tokens, now),
+            timeout=max(1, math.ceil((capacity - tokens) / rate)),
+        )
+        return wait
+
+    def clear(self):
+        caches[self.alias].clear()
+
+
+def create_store(name):
+    if name == 'memory':
+        return MemoryBucketStore(settings.THROTTLE_MEMORY_SIZE)
+    if name == 'sqlite':
+        return SqliteBucketStore(settings.THROTTLE_SQLITE_PATH)
+    if name == 'cache':
+        return CacheBucketStore(settings.THROTTLE_CACHE_ALIAS)
+    raise ValueError(f'Unknown THROTTLE_STORE: {name}')
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_store():
+    name = settings.THROTTLE_STORE
+    store = _stores.get(name)
+    if store is None:
+        with _stores_lock:
+            store = _stores.get(name)
+            if store is None:
+                store = _stores[name] = create_store(name)
+    return store
+
+
+def clear_stores():
+    with _stores_lock:
+        for store in _stores.values():
+            store.clear()
+
+
+class TokenBucketThrottle(SimpleRateThrottle):
+    # `num/period` rates of DEFAULT_THROTTLE_RATES: bursts of `num`
+    # requests, then one request every `period / num`
+    wait_time = 0
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+        key = self.get_cache_key(request, view)
+        if key is None:
+            return True
+        self.wait_time = get_store().take(
+            key, self.num_requests, self.num_requests / self.duration
+        )
+        if self.wait_time:
+            metrics.inc('api_throttled_requests_total', scope=self.scope)
+            return False
+        return True
+
+    def wait(self):
+        return self.wait_time
+
+
+class AuthIpThrottle(TokenBucketThrottle):
+    scope = 'auth_ip'
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {
+            'scope': self.scope,
+            'ident': self.get_ident(request),
+        }
+
+
+class AuthUsernameThrottle(TokenBucketThrottle):
+    # confirmation code guesses and emails for one account, from any ip
+    scope = 'auth_username'
+
+    def get_cache_key(self, request, view):
+        data = request.data
+        username = data.get('username') if isinstance(data, dict) else None
+        if not isinstance(username, str) or not username:
+            return None
+        return self.cache_format % {
+            'scope': self.scope,
+            'ident': hashlib.md5(username.lower().encode()).hexdigest(),
+        }
@@ -1,8 +1,14 @@
 from django.conf import settings
-from django.core.mail import send_mail
+
+from users.models import OutgoingEmail
 
 
 def send_confirmation_code(recipient_email, confirmation_code):
-    subject = 'Регистрация на yamdb'
-    message = f'Ваш код доступа: {confirmation_code}'
-    send_mail(subject, message, settings.DEFAULT_FROM_EMAIL, [recipient_email])
+    # queued in the outbox, so signup doesn't wait for the mail server;
+    # delivered by the `sendoutbox` command
+    OutgoingEmail.objects.create(
+        subject='Регистрация на yamdb',
+        message=f'Ваш код доступа: {confirmation_code}',
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        recipient=recipient_email,
+    )
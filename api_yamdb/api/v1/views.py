@@ -1,15 +1,22 @@
 from django.contrib.auth import get_user_model
 from django.contrib.auth.tokens import default_token_generator
-from django.db.models import Avg
+from django.db import transaction
 from django.shortcuts import get_object_or_404
+from django.utils.functional import cached_property
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters, permissions, status
-from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework.decorators import (
+    action,
+    api_view,
+    permission_classes,
+    throttle_classes,
+)
 from rest_framework.response import Response
-from rest_framework_simplejwt.tokens import AccessToken
 
+from api.v1.authentication import AccessToken
 from api.v1.filters import TitleFilter
 from api.v1.mixins import CreateListDeleteViewSet, DenyPutViewSet
+from api.v1.pagination import PublicationPagination, TitlePagination
 from api.v1.permissions import (
     IsAdmin,
     IsAdminModeratorAuthorOrReadOnly,
@@ -26,8 +33,9 @@ from api.v1.serializers import (
     TokenSerializer,
     UserSerializer,
 )
+from api.v1.throttling import AuthIpThrottle, AuthUsernameThrottle
 from api.v1.utils import send_confirmation_code
-from reviews.models import Category, Genre, Review, Title
+from reviews.models import Category, Genre, GenreTitle, Review, Title
 
 User = get_user_model()
 
@@ -59,6 +67,7 @@ class UserViewSet(DenyPutViewSet):
 
 @api_view(['POST'])
 @permission_classes([permissions.AllowAny])
+@throttle_classes([AuthIpThrottle, AuthUsernameThrottle])
 def get_jwt_token(request):
     serializer = TokenSerializer(data=request.data)
     serializer.is_valid(raise_exception=True)
@@ -68,6 +77,7 @@ def get_jwt_token(request):
     if default_token_generator.check_token(
         user, serializer.validated_data['confirmation_code']
     ):
+        # role claims let permissions skip loading the user
         token = AccessToken.for_user(user)
         # use 'str' here, because without it we get error:
         # TypeError: Object of type AccessToken is not JSON serializable
@@ -80,31 +90,36 @@ def get_jwt_token(request):
 
 @api_view(['POST'])
 @permission_classes([permissions.AllowAny])
+@throttle_classes([AuthIpThrottle, AuthUsernameThrottle])
 def create_user(request):
     serializer = RegisterSerializer(data=request.data)
     serializer.is_valid(raise_exception=True)
-
-    username = serializer.validated_data.get('username')
-    email = serializer.validated_data.get('email')
-    user = User.objects.filter(username=username, email=email).first()
-
+    # a repeated signup only gets a new confirmation code
+    user = serializer.registered_user
     if user is not None:
-        confirmation_code = default_token_generator.make_token(user)
-        send_confirmation_code(user.email, confirmation_code)
+        send_confirmation_code(
+            user.email, default_token_generator.make_token(user)
+        )
         return Response(serializer.validated_data, status=status.HTTP_200_OK)
-
-    serializer.save()
-    user = get_object_or_404(User, username=username, email=email)
-    confirmation_code = default_token_generator.make_token(user)
-    send_confirmation_code(user.email, confirmation_code)
+    # the user and its confirmation email are saved together
+    with transaction.atomic():
+        user = serializer.save()
+        send_confirmation_code(
+            user.email, default_token_generator.make_token(user)
+        )
     return Response(serializer.data, status=status.HTTP_200_OK)
 
 
 class TitleViewSet(DenyPutViewSet):
-    queryset = Title.objects.annotate(rating=Avg('reviews__score')).order_by(
-        'name'
+    queryset = (
+        Title.objects.select_related('category')
+        .prefetch_related('genre')
+        .order_by('name')
     )
     permission_classes = (IsAdminOrSuperuserOrReadOnly,)
+    pagination_class = TitlePagination
+    cache_models = (Title, Genre, Category, GenreTitle, Review)
+    last_modified_field = 'updated_at'
     filter_backends = (DjangoFilterBackend,)
     filterset_class = TitleFilter
 
@@ -118,6 +133,7 @@ class CategoryViewSet(CreateListDeleteViewSet):
     permission_classes = (IsAdminOrSuperuserOrReadOnly,)
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
+    cache_models = (Category,)
     filter_backends = (filters.SearchFilter,)
     search_fields = ('=name',)
     lookup_field = 'slug'
@@ -127,6 +143,7 @@ class GenreViewSet(CreateListDeleteViewSet):
     permission_classes = (IsAdminOrSuperuserOrReadOnly,)
     queryset = Genre.objects.all()
     serializer_class = GenreSerializer
+    cache_models = (Genre,)
     filter_backends = (filters.SearchFilter,)
     search_fields = ('=name',)
     lookup_field = 'slug'
@@ -135,30 +152,37 @@ class GenreViewSet(CreateListDeleteViewSet):
 class CommentViewSet(DenyPutViewSet):
     serializer_class = CommentSerializer
     permission_classes = (IsAdminModeratorAuthorOrReadOnly,)
-
-    def get_review(self):
-        return get_object_or_404(Review, id=self.kwargs.get('review_id'))
+    pagination_class = PublicationPagination
+    last_modified_field = 'updated_at'
+
+    @cached_property
+    def review(self):
+        # the review must belong to the title from the url
+        return get_object_or_404(
+            Review,
+            id=self.kwargs.get('review_id'),
+            title_id=self.kwargs.get('title_id'),
+        )
 
     def perform_create(self, serializer):
-        serializer.save(author=self.request.user, review=self.get_review())
+        serializer.save(author=self.request.user, review=self.review)
 
     def get_queryset(self):
-        return self.get_review().comments.all()
+        return self.review.comments.select_related('author')
 
 
 class ReviewViewSet(DenyPutViewSet):
     serializer_class = ReviewSerializer
     permission_classes = (IsAdminModeratorAuthorOrReadOnly,)
+    pagination_class = PublicationPagination
+    last_modified_field = 'updated_at'
 
-    def get_title(self):
+    @cached_property
+    def title(self):
         return get_object_or_404(Title, id=self.kwargs.get('title_id'))
 
     def get_queryset(self):
-        return self.get_title().reviews.all()
+        return self.title.reviews.select_related('author')
 
     def perform_create(self, serializer):
-        review = Review.objects.filter(
-            author=self.request.user, title=self.get_title()
-        )
-        serializer.check_only_one_review(review)
-        serializer.save(author=self.request.user, title=self.get_title())
+        serializer.save(author=self.request.user, title=self.title)
@@ -1,5 +1,6 @@
 import os
 import sys
+import tempfile
 from datetime import timedelta
 from pathlib import Path
 
@@ -38,15 +39,21 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.middleware.MetricsMiddleware',
+    'api.middleware.RequestTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
-    'django.contrib.sessions.middleware.SessionMiddleware',
+    # sessions, CSRF, messages and frame options are skipped for
+    # API_PATH_PREFIX, which authenticates with JWT
+    'api.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
-    'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
-    'django.contrib.messages.middleware.MessageMiddleware',
-    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'api.middleware.CsrfViewMiddleware',
+    'api.middleware.AuthenticationMiddleware',
+    'api.middleware.MessageMiddleware',
+    'api.middleware.XFrameOptionsMiddleware',
 ]
 
+API_PATH_PREFIX = '/api/'
+
 ROOT_URLCONF = 'api_yamdb.urls'
 
 TEMPLATES_DIR = BASE_DIR / 'templates'
@@ -78,6 +85,74 @@ DATABASES = {
     }
 }
 
+# PRAGMA statements run on every new sqlite connection, see
+# settings_production.py
+SQLITE_PRAGMAS = {}
+
+
+# Cache
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # locmem by default, which is per process: servers with several
+    # worker processes need a shared backend (FileBasedCache or a
+    # Redis-compatible one) for the version counters, as in
+    # settings_production.py
+    'catalog': {
+        'BACKEND': os.getenv(
+            'CATALOG_CACHE_BACKEND',
+            'django.core.cache.backends.locmem.LocMemCache',
+        ),
+        'LOCATION': os.getenv('CATALOG_CACHE_LOCATION', 'catalog'),
+    },
+    # token buckets of the /auth/ throttles with THROTTLE_STORE = 'cache'
+    'throttle': {
+        'BACKEND': os.getenv(
+            'THROTTLE_CACHE_BACKEND',
+            'django.core.cache.backends.locmem.LocMemCache',
+        ),
+        'LOCATION': os.getenv('THROTTLE_CACHE_LOCATION', 'throttle'),
+    },
+}
+
+CATALOG_CACHE_ALIAS = 'catalog'
+
+CATALOG_CACHE_ENABLED = os.getenv('CATALOG_CACHE_ENABLED', 'True') == 'True'
+
+CATALOG_CACHE_TIMEOUT = 60 * 5
+
+# `Server-Timing` headers and log lines with SQL, serializer and auth time
+REQUEST_TIMING_ENABLED = os.getenv('REQUEST_TIMING_ENABLED', 'False') == 'True'
+
+# share of requests to measure, from 0 to 1
+REQUEST_TIMING_SAMPLE_RATE = float(
+    os.getenv('REQUEST_TIMING_SAMPLE_RATE', '1.0')
+)
+
+# request metrics for /metrics, collected in per-process files of
+# METRICS_DIR; clear the directory when a multi-process server starts
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'False') == 'True'
+
+METRICS_DIR = os.getenv(
+    'METRICS_DIR', os.path.join(tempfile.gettempdir(), 'api_yamdb_metrics')
+)
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'api.timing': {
+            'handlers': ['console'],
+            'level': 'INFO',
+        },
+    },
+}
+
 
 # Password validation
 
@@ -126,7 +201,7 @@ DEFAULT_FROM_EMAIL = 'admin@yamdb.com'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.v1.authentication.CachedJWTAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
@@ -136,8 +211,36 @@ REST_FRAMEWORK = {
     ),
     'PAGE_SIZE': 5,
     'TEST_REQUEST_DEFAULT_FORMAT': 'json',
+    # token buckets of the signup and token endpoints
+    'DEFAULT_THROTTLE_RATES': {
+        'auth_ip': '20/min',
+        'auth_username': '5/min',
+    },
+    # reverse proxies in front of the server: the throttles take the client
+    # ip from X-Forwarded-For only behind them, with 0 the header sent by
+    # the client is ignored
+    'NUM_PROXIES': int(os.getenv('NUM_PROXIES', 0)),
 }
 
+# where the throttle buckets are kept: 'memory' for every process on its
+# own, 'sqlite' in THROTTLE_SQLITE_PATH or 'cache' in the cache
+# THROTTLE_CACHE_ALIAS, shared by the processes
+THROTTLE_STORE = os.getenv('THROTTLE_STORE', 'memory')
+
+THROTTLE_SQLITE_PATH = os.getenv(
+    'THROTTLE_SQLITE_PATH', os.path.join(BASE_DIR, 'throttle.sqlite3')
+)
+
+THROTTLE_CACHE_ALIAS = 'throttle'
+
+# buckets kept by the memory store, the least recently used are dropped
+THROTTLE_MEMORY_SIZE = 100000
+
+# seconds a user loaded for a JWT is served from the per-process cache
+USER_CACHE_TIMEOUT = 60
+
+USER_CACHE_SIZE = 10000
+
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(days=1),
     'AUTH_HEADER_TYPES': ('Bearer',),
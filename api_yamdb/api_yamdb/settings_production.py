@@ -0,0 +1,46 @@
+# Production profile: DJANGO_SETTINGS_MODULE=api_yamdb.settings_production
+import os
+import tempfile
+
+from api_yamdb.settings import *  # noqa: F401,F403
+from api_yamdb.settings import CACHES, DATABASES
+
+# keep connections between requests instead of opening one per request
+DATABASES = {'default': {**DATABASES['default'], 'CONN_MAX_AGE': 600}}
+
+SQLITE_PRAGMAS = {
+    # readers see the last commit while a review is being written instead
+    # of waiting for the writer
+    'journal_mode': 'WAL',
+    # WAL stays consistent on a crash, only the last commits may be lost
+    'synchronous': 'NORMAL',
+    # writers wait for each other instead of failing with "locked"
+    'busy_timeout': 5000,
+    # negative values are KiB: 64 MiB of page cache per connection
+    'cache_size': -64 * 1024,
+    'mmap_size': 256 * 1024 * 1024,
+}
+
+# the version counters of the catalog cache must be shared by all the
+# worker processes: with the per-process locmem cache a write bumps the
+# versions of the worker that handled it only, the others keep serving
+# stale responses and ETags. Files are shared by the workers of one host,
+# CATALOG_CACHE_BACKEND may name a Redis-compatible one for several hosts.
+# FileBasedCache has no atomic operations: a bump writes a new unique
+# version, so concurrent bumps never end on the same one, and the last
+# written wins
+CACHES = {
+    **CACHES,
+    'catalog': {
+        'BACKEND': os.getenv(
+            'CATALOG_CACHE_BACKEND',
+            'django.core.cache.backends.filebased.FileBasedCache',
+        ),
+        'LOCATION': os.getenv(
+            'CATALOG_CACHE_LOCATION',
+            os.path.join(tempfile.gettempdir(), 'api_yamdb_catalog'),
+        ),
+        # culling drops random keys, versions included, so it must be rare
+        'OPTIONS': {'MAX_ENTRIES': 100000},
+    },
+}
@@ -0,0 +1,99 @@
+import csv
+import gzip
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from reviews.management.commands.loadcsv import FILENAME_TO_MODEL_MAP
+
+DEFAULT_CHUNK_SIZE = 2000
+
+# columns of the static/data layout, so `loadcsv` can read the dump back;
+# passwords and other auth fields of users are never exported
+CSV_COLUMNS = {
+    'users': (
+        'id',
+        'username',
+        'email',
+        'role',
+        'bio',
+        'first_name',
+        'last_name',
+    ),
+    'category': ('id', 'name', 'slug'),
+    'genre': ('id', 'name', 'slug'),
+    'titles': ('id', 'name', 'year', 'category', 'description'),
+    'genre_title': ('id', 'title_id', 'genre_id'),
+    'review': ('id', 'title_id', 'text', 'author', 'score', 'pub_date'),
+    'comments': ('id', 'review_id', 'text', 'author', 'pub_date'),
+}
+
+
+def format_value(value):
+    if value is None:
+        return ''
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return value
+
+
+def open_output(f_path, compress):
+    if compress:
+        return gzip.open(f'{f_path}.gz', 'wt', newline='', encoding='utf-8')
+    return open(f_path, 'w', newline='', encoding='utf-8')
+
+
+def dump_model(f_path, model, columns, chunk_size, compress=False):
+    # values_list + iterator stream the table in chunks without building
+    # model instances, memory doesn't depend on the size of the table
+    rows = (
+        model.objects.order_by('pk')
+        .values_list(*columns)
+        .iterator(chunk_size=chunk_size)
+    )
+    written = 0
+    with open_output(f_path, compress) as csvfile:
+        writer = csv.writer(csvfile)
+        writer.writerow(columns)
+        for row in rows:
+            writer.writerow([format_value(value) for value in row])
+            written += 1
+    return written
+
+
+class Command(BaseCommand):
+    help = 'Dump DB data to csv files in the loadcsv layout'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'csv_dir_path', type=str, help='Путь до директории для csv файлов'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=DEFAULT_CHUNK_SIZE,
+            help='Количество строк, читаемых из базы за один запрос',
+        )
+        parser.add_argument(
+            '--gzip',
+            action='store_true',
+            help='Сжимать файлы в формате gzip (*.csv.gz)',
+        )
+
+    def handle(self, *args, **options):
+        csv_dir = options['csv_dir_path']
+        if options['chunk_size'] < 1:
+            raise CommandError('Размер пакета должен быть больше нуля.')
+        os.makedirs(csv_dir, exist_ok=True)
+        for f_name, model in FILENAME_TO_MODEL_MAP:
+            written = dump_model(
+                os.path.join(csv_dir, f'{f_name}.csv'),
+                model,
+                CSV_COLUMNS[f_name],
+                options['chunk_size'],
+                options['gzip'],
+            )
+            self.stdout.write(f'{f_name}.csv: выгружено {written} строк')
+        self.stdout.write(
+            self.style.SUCCESS('Выгрузка данных завершена успешно')
+        )
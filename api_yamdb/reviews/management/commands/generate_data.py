@@ -0,0 +1,249 @@
+import random
+from collections import Counter
+from itertools import accumulate, islice
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Max
+
+from reviews.management.commands.loadcsv import rebuild_derived_data
+from reviews.models import Category, Comment, Genre, GenreTitle, Review, Title
+
+User = get_user_model()
+
+DEFAULT_BATCH_SIZE = 1000
+
+MAX_GENRES_PER_TITLE = 3
+
+# most scores are good, like on real review sites
+SCORE_WEIGHTS = (1, 1, 2, 3, 4, 6, 9, 11, 9, 6)
+
+
+def get_next_id(model):
+    # generated rows continue the existing ids, so the command can add
+    # data to a database that already has some
+    return (model.objects.aggregate(last=Max('pk'))['last'] or 0) + 1
+
+
+def zipf_weights(size, exponent):
+    return list(
+        accumulate(1 / rank**exponent for rank in range(1, size + 1))
+    )
+
+
+def distribute_reviews(rng, titles, reviews, users, exponent):
+    # the title of every review is drawn with zipfian popularity; a title
+    # can't have more reviews than there are authors, the excess is drawn
+    # again among the other titles
+    popular = list(titles)
+    rng.shuffle(popular)
+    counts = Counter()
+    left = reviews
+    while left:
+        weights = zipf_weights(len(popular), exponent)
+        for title_id in rng.choices(popular, cum_weights=weights, k=left):
+            counts[title_id] += 1
+        left = 0
+        for title_id in popular:
+            if counts[title_id] > users:
+                left += counts[title_id] - users
+                counts[title_id] = users
+        popular = [
+            title_id for title_id in popular if counts[title_id] < users
+        ]
+    return counts
+
+
+def bulk_create(model, objs, batch_size):
+    objs = iter(objs)
+    created = 0
+    while True:
+        batch = list(islice(objs, batch_size))
+        if not batch:
+            return created
+        model.objects.bulk_create(batch)
+        created += len(batch)
+
+
+class Generator:
+    def __init__(self, options):
+        self.rng = random.Random(options['seed'])
+        self.options = options
+        self.ids = {
+            model: get_next_id(model)
+            for model in (
+                User,
+                Category,
+                Genre,
+                Title,
+                GenreTitle,
+                Review,
+                Comment,
+            )
+        }
+
+    def id_range(self, model, size):
+        return range(self.ids[model], self.ids[model] + size)
+
+    def users(self):
+        password = make_password(None)
+        for user_id in self.id_range(User, self.options['users']):
+            yield User(
+                id=user_id,
+                username=f'user{user_id}',
+                email=f'user{user_id}@yamdb.fake',
+                password=password,
+            )
+
+    def categories(self):
+        for category_id in self.id_range(Category, self.options['categories']):
+            yield Category(
+                id=category_id,
+                name=f'Категория {category_id}',
+                slug=f'category-{category_id}',
+            )
+
+    def genres(self):
+        for genre_id in self.id_range(Genre, self.options['genres']):
+            yield Genre(
+                id=genre_id,
+                name=f'Жанр {genre_id}',
+                slug=f'genre-{genre_id}',
+            )
+
+    def titles(self):
+        categories = self.id_range(Category, self.options['categories'])
+        for title_id in self.id_range(Title, self.options['titles']):
+            yield Title(
+                id=title_id,
+                name=f'Произведение {title_id}',
+                year=self.rng.randint(1900, 2022),
+                description=f'Описание произведения {title_id}',
+                category_id=self.rng.choice(categories),
+            )
+
+    def genre_titles(self):
+        genres = self.id_range(Genre, self.options['genres'])
+        genre_title_id = self.ids[GenreTitle]
+        for title_id in self.id_range(Title, self.options['titles']):
+            size = self.rng.randint(1, min(MAX_GENRES_PER_TITLE, len(genres)))
+            for genre_id in sorted(self.rng.sample(genres, size)):
+                yield GenreTitle(
+                    id=genre_title_id, title_id=title_id, genre_id=genre_id
+                )
+                genre_title_id += 1
+
+    def reviews(self):
+        users = self.id_range(User, self.options['users'])
+        counts = distribute_reviews(
+            self.rng,
+            self.id_range(Title, self.options['titles']),
+            self.options['reviews'],
+            len(users),
+            self.options['zipf'],
+        )
+        review_id = self.ids[Review]
+        for title_id in sorted(counts):
+            # distinct authors keep the `unique review` constraint
+            for author_id in self.rng.sample(users, counts[title_id]):
+                yield Review(
+                    id=review_id,
+                    title_id=title_id,
+                    author_id=author_id,
+                    score=self.rng.choices(
+                        range(1, 11), weights=SCORE_WEIGHTS
+                    )[0],
+                    text=f'Отзыв {review_id}',
+                )
+                review_id += 1
+
+    def comments(self):
+        users = self.id_range(User, self.options['users'])
+        # reviews of popular titles are more numerous, so a uniform choice
+        # of the review keeps the zipfian skew for comments too
+        reviews = self.id_range(Review, self.options['reviews'])
+        for comment_id in self.id_range(Comment, self.options['comments']):
+            yield Comment(
+                id=comment_id,
+                review_id=self.rng.choice(reviews),
+                author_id=self.rng.choice(users),
+                text=f'Комментарий {comment_id}',
+            )
+
+
+class Command(BaseCommand):
+    help = 'Generate a large synthetic dataset for scale testing'
+
+    def add_arguments(self, parser):
+        for name, default, help_text in (
+            ('users', 1000, 'Количество пользователей'),
+            ('categories', 5, 'Количество категорий'),
+            ('genres', 20, 'Количество жанров'),
+            ('titles', 1000, 'Количество произведений'),
+            ('reviews', 10000, 'Количество отзывов'),
+            ('comments', 20000, 'Количество комментариев'),
+        ):
+            parser.add_argument(
+                f'--{name}', type=int, default=default, help=help_text
+            )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=0,
+            help='Зерно генератора, одинаковое зерно даёт одинаковые данные',
+        )
+        parser.add_argument(
+            '--zipf',
+            type=float,
+            default=1.1,
+            help='Показатель распределения Ципфа популярности произведений',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help='Количество строк, записываемых в базу за один запрос',
+        )
+
+    def validate(self, options):
+        if options['batch_size'] < 1:
+            raise CommandError('Размер пакета должен быть больше нуля.')
+        for name in ('users', 'categories', 'genres', 'titles'):
+            if options[name] < 1:
+                raise CommandError(
+                    f'Значение --{name} должно быть больше нуля.'
+                )
+        if not 0 <= options['reviews'] <= options['users'] * options['titles']:
+            raise CommandError(
+                'Каждый пользователь может оставить только один отзыв на '
+                'произведение: уменьшите --reviews.'
+            )
+        if options['comments'] < 0 or (
+            options['comments'] and not options['reviews']
+        ):
+            raise CommandError('Для комментариев нужны отзывы.')
+
+    def handle(self, *args, **options):
+        self.validate(options)
+        generator = Generator(options)
+        changed_models = set()
+        with transaction.atomic():
+            for model, objs in (
+                (User, generator.users()),
+                (Category, generator.categories()),
+                (Genre, generator.genres()),
+                (Title, generator.titles()),
+                (GenreTitle, generator.genre_titles()),
+                (Review, generator.reviews()),
+                (Comment, generator.comments()),
+            ):
+                created = bulk_create(model, objs, options['batch_size'])
+                self.stdout.write(f'{model._meta.db_table}: создано {created}')
+                if created:
+                    changed_models.add(model)
+            rebuild_derived_data(changed_models)
+        self.stdout.write(
+            self.style.SUCCESS('Генерация данных завершена успешно')
+        )
@@ -1,10 +1,32 @@
-import csv
+import multiprocessing
 import os
+import queue
+import time
+from contextlib import ExitStack, contextmanager
+from functools import partial
 
 from django.contrib.auth import get_user_model
 from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
 
-from reviews.models import Category, Comment, Genre, GenreTitle, Review, Title
+from api.v1 import cache
+from reviews import search
+from reviews.management.csv_utils import (
+    END_OF_FILE,
+    parse_to_queue,
+    read_batches,
+    read_rows,
+    row_digest,
+)
+from reviews.models import (
+    Category,
+    Comment,
+    Genre,
+    GenreTitle,
+    ImportedRow,
+    Review,
+    Title,
+)
 
 User = get_user_model()
 
@@ -19,9 +41,298 @@ FILENAME_TO_MODEL_MAP = (
     ('comments', Comment),
 )
 
+DEFAULT_BATCH_SIZE = 1000
+
+PROGRESS_INTERVAL = 1
+
+# parsed batches a worker may queue ahead of the writer
+QUEUE_SIZE = 4
+
+# sqlite session settings of `--fast`, restored after the import
+FAST_IMPORT_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'OFF',
+    # negative values are KiB: 512 MiB of page cache
+    'cache_size': -512 * 1024,
+}
+
+# non-unique indexes of these models are built once after the import
+DEFERRED_INDEX_MODELS = (Review, Comment, GenreTitle)
+
+# upserted rows of these models change the rating or the search index of
+# the title in the field
+TITLE_FIELDS = {Title: 'id', Review: 'title'}
+
+# titles whose derived data is refreshed by one query
+REFRESH_CHUNK_SIZE = 500
+
+
+def get_fk_columns(model):
+    # csv files name foreign key columns either by the field name
+    # (`category`, `author`) or by the column name (`title_id`), both are
+    # assigned by id without loading the related objects
+    columns = {}
+    for field in model._meta.concrete_fields:
+        if field.many_to_one:
+            columns[field.name] = field.attname
+            columns[field.attname] = field.attname
+    return columns
+
+
+def get_dependencies(model, models):
+    return {
+        field.related_model
+        for field in model._meta.concrete_fields
+        if field.many_to_one
+        and field.related_model in models
+        and field.related_model is not model
+    }
+
+
+def get_load_order(file_map=FILENAME_TO_MODEL_MAP):
+    # topological order of the files by foreign keys between their models,
+    # ties keep the order of the map
+    models = {model for _, model in file_map}
+    pending = list(file_map)
+    loaded = set()
+    order = []
+    while pending:
+        ready = [
+            (f_name, model)
+            for f_name, model in pending
+            if get_dependencies(model, models) <= loaded
+        ]
+        if not ready:
+            raise CommandError(
+                'Не удалось определить порядок загрузки файлов: '
+                f'{", ".join(f_name for f_name, _ in pending)}'
+            )
+        for item in ready:
+            pending.remove(item)
+            loaded.add(item[1])
+        order.extend(ready)
+    return order
+
+
+def queue_batches(batches, process):
+    while True:
+        try:
+            item = batches.get(timeout=PROGRESS_INTERVAL)
+        except queue.Empty:
+            if process.is_alive():
+                continue
+            # a parser flushes its queue before exiting, so an empty queue
+            # of a finished one means it was killed
+            raise ValueError(
+                f'процесс разбора файла завершился с кодом {process.exitcode}'
+            )
+        if item is END_OF_FILE:
+            return
+        if isinstance(item, str):
+            raise ValueError(item)
+        yield item
+
+
+def insert_batch(f_name, model, batch):
+    columns, rows, _ = batch
+    model.objects.bulk_create(
+        model(**dict(zip(columns, values))) for values in rows
+    )
+    return len(rows)
+
+
+def upsert_batch(f_name, model, batch, title_ids=None):
+    # rows whose content hash didn't change since the previous upsert are
+    # skipped, so a delta costs time proportional to the changed rows;
+    # titles affected by the changed rows are added to `title_ids`
+    pk = model._meta.pk
+    columns, rows, row_digests = batch
+    if row_digests is None:
+        row_digests = [row_digest(dict(zip(columns, row))) for row in rows]
+    digests = {}
+    objs = []
+    for values, digest in zip(rows, row_digests):
+        obj = model(**dict(zip(columns, values)))
+        obj.pk = pk.to_python(obj.pk)
+        digests[obj.pk] = digest
+        objs.append(obj)
+    stored = {
+        row_id: (hash_id, digest)
+        for hash_id, row_id, digest in ImportedRow.objects.filter(
+            source=f_name, row_id__in=digests
+        ).values_list('id', 'row_id', 'digest')
+    }
+    changed = [
+        obj
+        for obj in objs
+        if stored.get(obj.pk, (None, None))[1] != digests[obj.pk]
+    ]
+    if not changed:
+        return 0
+    title_field = model._meta.pk
+    if model in TITLE_FIELDS:
+        title_field = model._meta.get_field(TITLE_FIELDS[model])
+    # a review moved to another title changes the old one too
+    existing = dict(
+        model.objects.filter(pk__in=[obj.pk for obj in changed]).values_list(
+            'pk', title_field.attname
+        )
+    )
+    if title_ids is not None and model in TITLE_FIELDS:
+        title_ids.update(existing.values())
+        title_ids.update(
+            title_field.to_python(title_field.value_from_object(obj))
+            for obj in changed
+        )
+    model.objects.bulk_create(obj for obj in changed if obj.pk not in existing)
+    update_rows(model, [obj for obj in changed if obj.pk in existing], columns)
+    ImportedRow.objects.bulk_create(
+        ImportedRow(source=f_name, row_id=obj.pk, digest=digests[obj.pk])
+        for obj in changed
+        if obj.pk not in stored
+    )
+    ImportedRow.objects.bulk_update(
+        [
+            ImportedRow(id=stored[obj.pk][0], digest=digests[obj.pk])
+            for obj in changed
+            if obj.pk in stored
+        ],
+        ('digest',),
+    )
+    return len(changed)
+
+
+def update_rows(model, objs, columns):
+    if not objs:
+        return
+    # bulk_update skips pre_save, so `auto_now` timestamps are set here
+    auto_now_fields = [
+        field
+        for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False)
+    ]
+    for obj in objs:
+        for field in auto_now_fields:
+            field.pre_save(obj, add=False)
+    fields = {column for column in columns if column != model._meta.pk.attname}
+    fields.update(field.attname for field in auto_now_fields)
+    model.objects.bulk_update(objs, fields)
+
+
+WRITERS = {
+    'insert': insert_batch,
+    'upsert': upsert_batch,
+}
 
-def load_data_from_csv(inst, csv_dir, errors):
-    for f_name, model in FILENAME_TO_MODEL_MAP:
+
+def load_file(inst, f_name, model, batches, write=insert_batch):
+    read = written = 0
+    started = reported = time.monotonic()
+    with transaction.atomic():
+        for batch in batches:
+            written += write(f_name, model, batch)
+            read += len(batch[1])
+            now = time.monotonic()
+            if now - reported >= PROGRESS_INTERVAL:
+                reported = now
+                inst.stdout.write(
+                    f'{f_name}.csv: обработано {read} строк '
+                    f'({read / (now - started):.0f} строк/с)'
+                )
+    elapsed = max(time.monotonic() - started, 1e-6)
+    inst.stdout.write(
+        f'{f_name}.csv: обработано {read} строк, записано {written}, '
+        f'за {elapsed:.1f} с ({read / elapsed:.0f} строк/с)'
+    )
+    return written
+
+
+class Parsers:
+    # one parsing process per file, at most `workers` at a time, writing
+    # batches to its own queue; files are started in the load order, so
+    # the file being written always has a running parser
+    def __init__(self, files, batch_size, workers, digests):
+        self.files = iter(files)
+        self.batch_size = batch_size
+        self.digests = digests
+        self.running = {}
+        for _ in range(workers):
+            self.start_next()
+
+    def start_next(self):
+        for f_name, model, f_path in self.files:
+            batches = multiprocessing.Queue(maxsize=QUEUE_SIZE)
+            process = multiprocessing.Process(
+                target=parse_to_queue,
+                args=(
+                    f_path,
+                    get_fk_columns(model),
+                    self.batch_size,
+                    batches,
+                    self.digests,
+                ),
+                daemon=True,
+            )
+            process.start()
+            self.running[f_name] = batches, process
+            return
+
+    def read(self, f_name):
+        return queue_batches(*self.running[f_name])
+
+    def stop(self, f_name):
+        # a parser whose file failed may be blocked on its full queue
+        batches, process = self.running.pop(f_name)
+        if process.is_alive():
+            process.terminate()
+        process.join()
+        batches.close()
+        self.start_next()
+
+    def close(self):
+        self.files = iter(())
+        for f_name in list(self.running):
+            self.stop(f_name)
+
+
+@contextmanager
+def fast_import(inst):
+    if connection.vendor != 'sqlite':
+        inst.stdout.write(
+            inst.style.WARNING('Опция --fast поддерживается только для SQLite')
+        )
+        yield
+        return
+    tables = [model._meta.db_table for model in DEFERRED_INDEX_MODELS]
+    with connection.cursor() as cursor:
+        previous = {}
+        for pragma, value in FAST_IMPORT_PRAGMAS.items():
+            cursor.execute(f'PRAGMA {pragma}')
+            previous[pragma] = cursor.fetchone()[0]
+            cursor.execute(f'PRAGMA {pragma} = {value}')
+        cursor.execute(
+            'SELECT name, sql FROM sqlite_master WHERE type = %s '
+            f'AND tbl_name IN ({", ".join(["%s"] * len(tables))}) '
+            "AND sql LIKE 'CREATE INDEX%%'",
+            ['index', *tables],
+        )
+        indexes = cursor.fetchall()
+        for name, _ in indexes:
+            cursor.execute(f'DROP INDEX {connection.ops.quote_name(name)}')
+    try:
+        yield
+    finally:
+        with connection.cursor() as cursor:
+            for _, sql in indexes:
+                cursor.execute(sql)
+            cursor.execute('ANALYZE')
+            for pragma, value in previous.items():
+                cursor.execute(f'PRAGMA {pragma} = {value}')
+
+
+def find_files(inst, csv_dir):
+    files = []
+    for f_name, model in get_load_order():
         f_path = f'{csv_dir}/{f_name}.csv'
         if not os.path.exists(f_path):
             inst.stdout.write(
@@ -31,25 +342,73 @@ def load_data_from_csv(inst, csv_dir, errors):
                 )
             )
             continue
-        with open(f_path, newline='') as csvfile:
+        files.append((f_name, model, f_path))
+    return files
+
+
+def rebuild_derived_data(changed_models, title_ids=None):
+    # bulk writes skip signals, so ratings and the search index are
+    # rebuilt in one pass: for every title after an insert, for the
+    # `title_ids` of the changed rows after an upsert; cached catalog
+    # responses and ETags are dropped after the commit
+    for model in changed_models:
+        transaction.on_commit(partial(cache.bump_version, model))
+    if title_ids is None:
+        if changed_models & {Title, Review}:
+            Title.objects.all().refresh_rating()
+        if Title in changed_models:
+            search.rebuild_index()
+        return
+    title_ids = sorted(title_ids)
+    for start in range(0, len(title_ids), REFRESH_CHUNK_SIZE):
+        end = start + REFRESH_CHUNK_SIZE
+        Title.objects.filter(pk__in=title_ids[start:end]).refresh_rating()
+    if Title in changed_models:
+        search.reindex_titles(title_ids)
+
+
+def load_data_from_csv(
+    inst,
+    csv_dir,
+    errors,
+    batch_size=DEFAULT_BATCH_SIZE,
+    workers=1,
+    mode='insert',
+    fast=False,
+):
+    files = find_files(inst, csv_dir)
+    changed_models = set()
+    write = WRITERS[mode]
+    title_ids = None
+    if mode == 'upsert':
+        title_ids = set()
+        write = partial(upsert_batch, title_ids=title_ids)
+    with ExitStack() as stack:
+        if fast:
+            stack.enter_context(fast_import(inst))
+        parsers = None
+        if workers > 1:
+            parsers = Parsers(files, batch_size, workers, mode == 'upsert')
+            stack.callback(parsers.close)
+        for f_name, model, f_path in files:
+            if parsers is not None:
+                batches = parsers.read(f_name)
+            else:
+                batches = read_batches(
+                    read_rows(f_path, get_fk_columns(model)), batch_size
+                )
             try:
-                data = csv.DictReader(csvfile, delimiter=',')
-                obj_list = []
-                for row in data:
-                    # use custom handling for data with Foreign keys
-                    if model is Title:
-                        row['category'] = Category.objects.get(
-                            id=row['category']
-                        )
-                    elif model in (Review, Comment):
-                        row['author'] = User.objects.get(id=row['author'])
-                    obj_list.append(model(**row))
-                model.objects.bulk_create(obj_list)
+                if load_file(inst, f_name, model, batches, write):
+                    changed_models.add(model)
             except Exception as exc:
                 errors.append(
                     f'Во время загрузки из файла {f_name}.csv возникла '
                     f'ошибка: {exc}'
                 )
+            finally:
+                if parsers is not None:
+                    parsers.stop(f_name)
+    rebuild_derived_data(changed_models, title_ids)
 
 
 class Command(BaseCommand):
@@ -59,6 +418,38 @@ class Command(BaseCommand):
         parser.add_argument(
             'csv_dir_path', type=str, help='Путь до директории с csv файлами'
         )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help='Количество строк, записываемых в базу за один запрос',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help=(
+                'Количество процессов для разбора csv файлов, '
+                'запись в базу всегда выполняет один процесс'
+            ),
+        )
+        parser.add_argument(
+            '--mode',
+            choices=tuple(WRITERS),
+            default='insert',
+            help=(
+                'insert - только добавление строк, upsert - добавление новых '
+                'и обновление изменившихся строк'
+            ),
+        )
+        parser.add_argument(
+            '--fast',
+            action='store_true',
+            help=(
+                'Ускоренная загрузка в SQLite: WAL без fsync, большой кэш '
+                'страниц и отложенное построение индексов'
+            ),
+        )
 
     def handle(self, *args, **options):
         csv_dir = options['csv_dir_path']
@@ -67,8 +458,20 @@ class Command(BaseCommand):
                 f'Директория {csv_dir} не была найдена. '
                 'Попробуйте указать другой путь.'
             )
+        if options['batch_size'] < 1:
+            raise CommandError('Размер пакета должен быть больше нуля.')
+        if options['workers'] < 1:
+            raise CommandError('Количество процессов должно быть больше нуля.')
         errors = []
-        load_data_from_csv(self, csv_dir, errors)
+        load_data_from_csv(
+            self,
+            csv_dir,
+            errors,
+            options['batch_size'],
+            options['workers'],
+            options['mode'],
+            options['fast'],
+        )
         if errors:
             raise CommandError('\n'.join(errors))
         self.stdout.write(
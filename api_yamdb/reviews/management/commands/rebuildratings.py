@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from reviews.models import Title
+
+
+class Command(BaseCommand):
+    help = 'Recalculate stored title ratings from existing reviews'
+
+    def handle(self, *args, **options):
+        updated = Title.objects.all().refresh_rating()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Рейтинг пересчитан для произведений: {updated}'
+            )
+        )
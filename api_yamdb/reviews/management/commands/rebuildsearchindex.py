@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from reviews import search
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search index of titles'
+
+    def handle(self, *args, **options):
+        search.create_index()
+        search.rebuild_index()
+        self.stdout.write(
+            self.style.SUCCESS('Поисковый индекс произведений перестроен')
+        )
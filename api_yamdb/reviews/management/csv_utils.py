@@ -0,0 +1,66 @@
+# csv parsing helpers without Django imports, so pool workers can run them
+# in freshly spawned processes
+import csv
+import hashlib
+import json
+from itertools import islice
+
+# worker queues end with this sentinel, a str item is a parsing error
+END_OF_FILE = None
+
+
+def read_rows(f_path, fk_columns):
+    # rows are (columns, values) pairs: the header once, value tuples after
+    with open(f_path, newline='', encoding='utf-8') as csvfile:
+        reader = csv.reader(csvfile, delimiter=',')
+        header = next(reader, None)
+        if header is None:
+            return
+        columns = tuple(fk_columns.get(column, column) for column in header)
+        is_fk = [column in fk_columns for column in header]
+        yield columns
+        for row in reader:
+            # blank lines are skipped, as csv.DictReader does
+            if not row:
+                continue
+            yield tuple(
+                (value or None) if fk else value
+                for fk, value in zip(is_fk, row)
+            )
+
+
+def read_batches(rows, batch_size, digests=False):
+    # batches are (columns, value tuples, row digests or None), small to
+    # pickle and ready for the writer, so the parsing workers do the
+    # per-row work
+    rows = iter(rows)
+    columns = next(rows, None)
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            return
+        yield (
+            columns,
+            batch,
+            [row_digest(dict(zip(columns, row))) for row in batch]
+            if digests
+            else None,
+        )
+
+
+def parse_to_queue(f_path, fk_columns, batch_size, queue, digests=False):
+    try:
+        for batch in read_batches(
+            read_rows(f_path, fk_columns), batch_size, digests
+        ):
+            queue.put(batch)
+    except Exception as exc:
+        queue.put(str(exc) or exc.__class__.__name__)
+    finally:
+        queue.put(END_OF_FILE)
+
+
+def row_digest(row):
+    return hashlib.sha1(
+        json.dumps(row, sort_keys=True, ensure_ascii=False).encode()
+    ).hexdigest()
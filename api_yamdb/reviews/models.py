@@ -2,6 +2,9 @@ from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
+from django.db.models import Count, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
 
 from .validators import year_validator
 
@@ -12,6 +15,9 @@ class CreatedModel(models.Model):
     pub_date = models.DateTimeField(
         auto_now_add=True, verbose_name='Дата публикации', db_index=True
     )
+    updated_at = models.DateTimeField(
+        auto_now=True, verbose_name='Дата изменения', db_index=True
+    )
 
     class Meta:
         abstract = True
@@ -43,8 +49,33 @@ class Category(models.Model):
         return self.name
 
 
+class TitleQuerySet(models.QuerySet):
+    def refresh_rating(self):
+        # recalculate the stored aggregates with a single UPDATE, so
+        # concurrent reviews of the same title never lose an increment
+        reviews = (
+            Review.objects.filter(title=OuterRef('pk'))
+            .order_by()
+            .values('title')
+        )
+        return self.update(
+            score_sum=Coalesce(
+                Subquery(reviews.annotate(total=Sum('score')).values('total')),
+                0,
+            ),
+            score_count=Coalesce(
+                Subquery(reviews.annotate(total=Count('pk')).values('total')),
+                0,
+            ),
+            updated_at=timezone.now(),
+        )
+
+
 class Title(models.Model):
-    name = models.CharField('Название', max_length=256)
+    # kept up to date by `TitleQuerySet.refresh_rating()`
+    AGGREGATE_FIELDS = ('score_sum', 'score_count')
+
+    name = models.CharField('Название', max_length=256, db_index=True)
     year = models.PositiveSmallIntegerField(
         'Год выпуска', validators=[year_validator]
     )
@@ -57,6 +88,17 @@ class Title(models.Model):
         on_delete=models.SET_NULL,
         blank=True,
     )
+    score_sum = models.PositiveIntegerField(
+        'Сумма оценок', default=0, editable=False
+    )
+    score_count = models.PositiveIntegerField(
+        'Количество оценок', default=0, editable=False
+    )
+    updated_at = models.DateTimeField(
+        'Дата изменения', auto_now=True, db_index=True
+    )
+
+    objects = TitleQuerySet.as_manager()
 
     class Meta:
         ordering = ('name',)
@@ -66,6 +108,24 @@ class Title(models.Model):
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        # the aggregates are written by `refresh_rating()` only: an update
+        # with the values loaded earlier would drop the reviews saved since
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in self.AGGREGATE_FIELDS
+            ]
+        super().save(*args, **kwargs)
+
+    @property
+    def rating(self):
+        if not self.score_count:
+            return None
+        return self.score_sum / self.score_count
+
 
 class GenreTitle(models.Model):
     genre = models.ForeignKey(Genre, on_delete=models.CASCADE)
@@ -109,11 +169,20 @@ class Review(CreatedModel):
                 name='unique review',
             ),
         )
+        indexes = (models.Index(fields=('title', 'pub_date', 'id')),)
         ordering = ('pub_date',)
 
     def __str__(self):
         return self.text[: settings.PRE_TEXT_LEN]
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # remember the loaded title, so moving a review to another title
+        # (e.g. from the admin) refreshes the rating of both of them
+        instance._loaded_title_id = instance.__dict__.get('title_id')
+        return instance
+
 
 class Comment(CreatedModel):
     review = models.ForeignKey(
@@ -144,7 +213,31 @@ class Comment(CreatedModel):
                 name='unique comment',
             ),
         )
+        indexes = (models.Index(fields=('review', 'pub_date', 'id')),)
         ordering = ('pub_date',)
 
     def __str__(self):
         return self.text[: settings.PRE_TEXT_LEN]
+
+
+class ImportedRow(models.Model):
+    # content hashes of rows loaded by `loadcsv --mode=upsert`
+    source = models.CharField('Файл', max_length=50)
+    row_id = models.BigIntegerField('Id строки')
+    digest = models.CharField('Хеш содержимого', max_length=40)
+
+    class Meta:
+        verbose_name = 'Импортированная строка'
+        verbose_name_plural = 'Импортированные строки'
+        constraints = (
+            models.UniqueConstraint(
+                fields=(
+                    'source',
+                    'row_id',
+                ),
+                name='unique imported row',
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.source} {self.row_id}'
@@ -0,0 +1,100 @@
+import re
+
+from django.db import connection
+
+from .models import Title
+
+FTS_TABLE = 'reviews_title_fts'
+WORD_PATTERN = re.compile(r'\w+')
+
+
+def is_supported():
+    return connection.vendor == 'sqlite'
+
+
+def create_index():
+    if not is_supported():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5('
+            "name, description, tokenize='unicode61 remove_diacritics 2')"
+        )
+
+
+def rebuild_index():
+    if not is_supported():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE}')
+        cursor.execute(
+            f'INSERT INTO {FTS_TABLE} (rowid, name, description) '
+            "SELECT id, name, COALESCE(description, '') "
+            f'FROM {Title._meta.db_table}'
+        )
+
+
+def reindex_titles(title_ids, chunk_size=500):
+    # the rows of `title_ids` only, for imports that changed a few titles
+    if not is_supported():
+        return
+    title_ids = list(title_ids)
+    with connection.cursor() as cursor:
+        for start in range(0, len(title_ids), chunk_size):
+            end = start + chunk_size
+            chunk = title_ids[start:end]
+            placeholders = ', '.join(['%s'] * len(chunk))
+            cursor.execute(
+                f'DELETE FROM {FTS_TABLE} WHERE rowid IN ({placeholders})',
+                chunk,
+            )
+            cursor.execute(
+                f'INSERT INTO {FTS_TABLE} (rowid, name, description) '
+                "SELECT id, name, COALESCE(description, '') "
+                f'FROM {Title._meta.db_table} WHERE id IN ({placeholders})',
+                chunk,
+            )
+
+
+def index_title(title):
+    if not is_supported():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [title.pk])
+        cursor.execute(
+            f'INSERT INTO {FTS_TABLE} (rowid, name, description) '
+            'VALUES (%s, %s, %s)',
+            [title.pk, title.name, title.description or ''],
+        )
+
+
+def unindex_title(title_id):
+    if not is_supported():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [title_id])
+
+
+def build_match_query(text):
+    # quote every word, so user input never reaches the FTS5 query syntax,
+    # and match by word prefix
+    return ' '.join(f'"{word}"*' for word in WORD_PATTERN.findall(text))
+
+
+def search_titles(queryset, text):
+    match_query = build_match_query(text)
+    if not match_query:
+        return queryset.none()
+    if not is_supported():
+        return queryset.filter(name__icontains=text) | queryset.filter(
+            description__icontains=text
+        )
+    return queryset.extra(
+        tables=[FTS_TABLE],
+        where=[
+            f'{FTS_TABLE}.rowid = {Title._meta.db_table}.id',
+            f'{FTS_TABLE} MATCH %s',
+        ],
+        params=[match_query],
+        order_by=[f'{FTS_TABLE}.rank', 'name'],
+    )
@@ -0,0 +1,34 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import search
+from .models import Review, Title
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def refresh_title_rating(sender, instance, **kwargs):
+    title_ids = {
+        instance.title_id,
+        getattr(instance, '_loaded_title_id', None),
+    }
+    title_ids.discard(None)
+    Title.objects.filter(pk__in=title_ids).refresh_rating()
+    instance._loaded_title_id = instance.title_id
+
+
+@receiver(post_save, sender=Title)
+def index_title(sender, instance, **kwargs):
+    search.index_title(instance)
+
+
+@receiver(post_delete, sender=Title)
+def unindex_title(sender, instance, **kwargs):
+    search.unindex_title(instance.pk)
+
+
+def create_search_index(sender, **kwargs):
+    # migrate and flush both end with post_migrate, so the index is
+    # created on a fresh database and never outlives truncated titles
+    search.create_index()
+    search.rebuild_index()
@@ -1,10 +1,23 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
 
-from .models import User
+from .models import OutgoingEmail, User
 
 
 @admin.register(User)
 class UserAdmin(UserAdmin):
     list_display = ('username', 'bio', 'email', 'role')
     list_editable = ('role',)
+
+
+@admin.register(OutgoingEmail)
+class OutgoingEmailAdmin(admin.ModelAdmin):
+    list_display = (
+        'recipient',
+        'subject',
+        'created_at',
+        'attempts',
+        'sent_at',
+    )
+    list_filter = ('sent_at',)
+    search_fields = ('recipient',)
@@ -0,0 +1,172 @@
+import time
+import uuid
+from datetime import timedelta
+
+from django.core.mail import EmailMessage, get_connection
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from users.models import OutgoingEmail
+
+DEFAULT_BATCH_SIZE = 100
+
+DEFAULT_MAX_ATTEMPTS = 5
+
+# seconds before the second attempt, doubled after every failed one
+DEFAULT_BACKOFF = 60
+
+DEFAULT_INTERVAL = 5
+
+# seconds a claimed batch is hidden from other runs; emails a crashed run
+# didn't send are retried after it
+DEFAULT_LEASE = 300
+
+
+def claim_due_emails(batch_size, max_attempts, lease):
+    # one conditional UPDATE moves the batch out of the due rows, so
+    # concurrent runs never get the same email
+    now = timezone.now()
+    due = OutgoingEmail.objects.filter(
+        sent_at__isnull=True, send_after__lte=now, attempts__lt=max_attempts
+    )
+    claim = uuid.uuid4().hex
+    claimed = due.filter(pk__in=due.values('pk')[:batch_size]).update(
+        claim=claim, send_after=now + timedelta(seconds=lease)
+    )
+    if not claimed:
+        return []
+    return list(
+        OutgoingEmail.objects.filter(claim=claim, sent_at__isnull=True)
+    )
+
+
+def mark_failed(email, error, now, backoff):
+    email.attempts += 1
+    email.last_error = str(error) or error.__class__.__name__
+    email.send_after = now + timedelta(
+        seconds=backoff * 2 ** (email.attempts - 1)
+    )
+
+
+def send_batch(emails, backoff):
+    # one backend connection (e.g. one SMTP session) for the whole batch,
+    # the result of every email is saved right after sending it
+    now = timezone.now()
+    sent = 0
+    connection = get_connection()
+    try:
+        connection.open()
+    except Exception as error:
+        for email in emails:
+            mark_failed(email, error, now, backoff)
+        OutgoingEmail.objects.bulk_update(
+            emails, ('attempts', 'send_after', 'last_error')
+        )
+        return sent
+    try:
+        for email in emails:
+            message = EmailMessage(
+                email.subject,
+                email.message,
+                email.from_email,
+                [email.recipient],
+                connection=connection,
+            )
+            try:
+                connection.send_messages([message])
+            except Exception as error:
+                mark_failed(email, error, now, backoff)
+            else:
+                email.attempts += 1
+                email.sent_at = now
+                email.last_error = ''
+                sent += 1
+            email.save(
+                update_fields=(
+                    'attempts',
+                    'sent_at',
+                    'send_after',
+                    'last_error',
+                )
+            )
+    finally:
+        connection.close()
+    return sent
+
+
+class Command(BaseCommand):
+    help = (
+        'Send queued emails from the outbox; concurrent runs claim '
+        'separate batches'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help='Количество писем, отправляемых через одно соединение',
+        )
+        parser.add_argument(
+            '--max-attempts',
+            type=int,
+            default=DEFAULT_MAX_ATTEMPTS,
+            help='Количество попыток отправки письма',
+        )
+        parser.add_argument(
+            '--backoff',
+            type=float,
+            default=DEFAULT_BACKOFF,
+            help=(
+                'Пауза перед повторной отправкой в секундах, удваивается '
+                'после каждой неудачной попытки'
+            ),
+        )
+        parser.add_argument(
+            '--lease',
+            type=float,
+            default=DEFAULT_LEASE,
+            help=(
+                'Время в секундах, на которое пакет писем закрепляется за '
+                'процессом; письма, не отправленные упавшим процессом, '
+                'отправляются повторно после него'
+            ),
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Не завершаться, проверяя очередь каждые --interval секунд',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=DEFAULT_INTERVAL,
+            help='Пауза между проверками очереди в режиме --loop',
+        )
+
+    def send_due_emails(self, options):
+        sent = failed = 0
+        while True:
+            emails = claim_due_emails(
+                options['batch_size'],
+                options['max_attempts'],
+                options['lease'],
+            )
+            if not emails:
+                return sent, failed
+            batch_sent = send_batch(emails, options['backoff'])
+            sent += batch_sent
+            failed += len(emails) - batch_sent
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('Размер пакета должен быть больше нуля.')
+        while True:
+            sent, failed = self.send_due_emails(options)
+            if sent or failed or not options['loop']:
+                self.stdout.write(
+                    f'Отправлено писем: {sent}, ошибок отправки: {failed}'
+                )
+            if not options['loop']:
+                return
+            time.sleep(options['interval'])
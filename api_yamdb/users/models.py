@@ -2,6 +2,7 @@ from django.conf import settings
 from django.contrib.auth.models import AbstractUser
 from django.core.exceptions import ValidationError
 from django.db import models
+from django.utils import timezone
 
 
 class User(AbstractUser):
@@ -27,6 +28,13 @@ class User(AbstractUser):
         choices=ROLES,
         default=USER,
     )
+    # is put into access tokens and bumped by role changes, which revokes
+    # the tokens issued before them
+    token_version = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Версия токенов',
+    )
 
     class Meta:
         # use ordering, because without we get warning in tests:
@@ -39,6 +47,23 @@ class User(AbstractUser):
     def __str__(self):
         return self.username
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        user = super().from_db(db, field_names, values)
+        if {'role', 'is_superuser'} <= set(field_names):
+            user._loaded_access = (user.role, user.is_superuser)
+        return user
+
+    def save(self, *args, **kwargs):
+        loaded = getattr(self, '_loaded_access', None)
+        if loaded is not None and loaded != (self.role, self.is_superuser):
+            self.token_version += 1
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'token_version'}
+        super().save(*args, **kwargs)
+        self._loaded_access = (self.role, self.is_superuser)
+
     def clean(self):
         super().clean()
         if self.username == 'me':
@@ -53,3 +78,38 @@ class User(AbstractUser):
     @property
     def is_moderator(self):
         return self.role == self.MODERATOR
+
+
+class OutgoingEmail(models.Model):
+    # emails are saved in the transaction of the change that sends them
+    # and delivered later by the `sendoutbox` command
+    subject = models.CharField('Тема', max_length=settings.MID_INT_LENGTH)
+    message = models.TextField('Текст')
+    from_email = models.EmailField(
+        'Отправитель', max_length=settings.BIG_INT_LENGTH
+    )
+    recipient = models.EmailField(
+        'Получатель', max_length=settings.BIG_INT_LENGTH
+    )
+    created_at = models.DateTimeField('Дата создания', auto_now_add=True)
+    send_after = models.DateTimeField('Отправить после', default=timezone.now)
+    attempts = models.PositiveSmallIntegerField('Попытки отправки', default=0)
+    sent_at = models.DateTimeField('Дата отправки', null=True, blank=True)
+    last_error = models.TextField('Последняя ошибка', blank=True)
+    # the `sendoutbox` run that claimed the email until `send_after`
+    claim = models.CharField('Метка отправки', max_length=32, blank=True)
+
+    class Meta:
+        ordering = ('send_after', 'id')
+        indexes = (
+            models.Index(
+                fields=('send_after',),
+                condition=models.Q(sent_at__isnull=True),
+                name='outgoing_email_pending',
+            ),
+        )
+        verbose_name = 'Исходящее письмо'
+        verbose_name_plural = 'Исходящие письма'
+
+    def __str__(self):
+        return f'{self.recipient}: {self.subject}'
@@ -0,0 +1,496 @@
+# Latency, query count and memory of every /api/v1/ route, measured
+# in-process through the WSGI application on a generated dataset:
+#
+#     python benchmarks/bench_api.py --output results.json
+#     python benchmarks/bench_api.py --compare results.json
+#
+# With --compare the run exits with code 1 if a route makes more queries
+# than in the stored baseline. Time and memory growth above --threshold and
+# the --min-delta-* noise floor is reported, and fails the run only with
+# --strict; --rounds repeats the measurement and keeps the best one.
+import argparse
+import json
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import Counter, namedtuple
+from io import BytesIO, StringIO
+from pathlib import Path
+from urllib.parse import quote
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.utils import setup_django, use_database  # noqa: E402
+
+# `path` and `body` may be callables of the request number, so writes
+# create distinct rows on every request; `status` is the expected one,
+# EXPECTED_STATUSES of the method by default
+Scenario = namedtuple('Scenario', 'name method path user body status')
+Scenario.__new__.__defaults__ = (None, None, None)
+
+EXPECTED_STATUSES = {'GET': 200, 'POST': 201, 'PATCH': 200, 'DELETE': 204}
+
+DATASET = {
+    'users': 2000,
+    'titles': 2000,
+    'reviews': 20000,
+    'comments': 40000,
+}
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def make_environ(method, path, token=None, body=None):
+    path, _, query = path.partition('?')
+    payload = json.dumps(body).encode() if body is not None else b''
+    environ = {
+        'REQUEST_METHOD': method,
+        'PATH_INFO': path,
+        'QUERY_STRING': quote(query, safe='=&'),
+        'SERVER_NAME': 'testserver',
+        'SERVER_PORT': '80',
+        'SERVER_PROTOCOL': 'HTTP/1.1',
+        'REMOTE_ADDR': '127.0.0.1',
+        'CONTENT_TYPE': 'application/json',
+        'CONTENT_LENGTH': str(len(payload)),
+        'wsgi.input': BytesIO(payload),
+        'wsgi.errors': sys.stderr,
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': 'http',
+        'wsgi.multithread': False,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+    }
+    if token:
+        environ['HTTP_AUTHORIZATION'] = f'Bearer {token}'
+    return environ
+
+
+def call(app, scenario, number, tokens):
+    path = scenario.path
+    body = scenario.body
+    environ = make_environ(
+        scenario.method,
+        path(number) if callable(path) else path,
+        tokens.get(scenario.user),
+        body(number) if callable(body) else body,
+    )
+    statuses = []
+    result = app(environ, lambda status, headers: statuses.append(status))
+    try:
+        b''.join(result)
+    finally:
+        # fires request_finished, as a real server does
+        result.close()
+    return int(statuses[0].split()[0])
+
+
+def build_fixtures(deletions):
+    from django.contrib.auth import get_user_model
+    from django.contrib.auth.tokens import default_token_generator
+    from django.db.models import Count
+
+    from api.v1.authentication import AccessToken
+    from reviews.models import Category, Genre, Review
+
+    User = get_user_model()
+    # every delete request removes its own row
+    for model in (Category, Genre):
+        model.objects.bulk_create(
+            model(name=f'Удаляемая {number}', slug=f'bench-{number}')
+            for number in range(deletions)
+        )
+    admin = User.objects.order_by('id').first()
+    User.objects.filter(pk=admin.pk).update(role=User.ADMIN)
+    admin.refresh_from_db()
+    review = (
+        Review.objects.annotate(comments_count=Count('comments'))
+        .order_by('-comments_count', 'id')
+        .select_related('author', 'title')
+        .first()
+    )
+    return {
+        'admin': admin,
+        'author': review.author,
+        'review': review,
+        'title': review.title,
+        'comment': review.comments.order_by('id').first(),
+        'genre': Genre.objects.order_by('id').first(),
+        'code': default_token_generator.make_token(admin),
+        'tokens': {
+            'admin': str(AccessToken.for_user(admin)),
+            'author': str(AccessToken.for_user(review.author)),
+        },
+    }
+
+
+def build_scenarios(fixtures):
+    title = fixtures['title']
+    review = fixtures['review']
+    reviews = f'/api/v1/titles/{title.id}/reviews/'
+    comments = f'{reviews}{review.id}/comments/'
+    return (
+        Scenario('api-root', 'GET', '/api/v1/', 'author'),
+        Scenario('titles-list', 'GET', '/api/v1/titles/'),
+        Scenario(
+            'titles-list:cursor', 'GET', '/api/v1/titles/?pagination=cursor'
+        ),
+        Scenario(
+            'titles-list:genre',
+            'GET',
+            f'/api/v1/titles/?genre={fixtures["genre"].slug}',
+        ),
+        Scenario('titles-list:search', 'GET', '/api/v1/titles/?search=произв'),
+        Scenario('titles-detail', 'GET', f'/api/v1/titles/{title.id}/'),
+        Scenario('genres-list', 'GET', '/api/v1/genres/'),
+        Scenario(
+            'genres-detail:delete',
+            'DELETE',
+            lambda number: f'/api/v1/genres/bench-{number}/',
+            'admin',
+        ),
+        Scenario('categories-list', 'GET', '/api/v1/categories/'),
+        Scenario(
+            'categories-detail:delete',
+            'DELETE',
+            lambda number: f'/api/v1/categories/bench-{number}/',
+            'admin',
+        ),
+        Scenario('reviews-list', 'GET', reviews),
+        Scenario('reviews-list:auth', 'GET', reviews, 'author'),
+        Scenario('reviews-detail', 'GET', f'{reviews}{review.id}/'),
+        Scenario(
+            'reviews-detail:patch',
+            'PATCH',
+            f'{reviews}{review.id}/',
+            'author',
+            lambda number: {'text': f'Отзыв, правка {number}'},
+        ),
+        Scenario('comments-list', 'GET', comments),
+        Scenario(
+            'comments-list:create',
+            'POST',
+            comments,
+            'author',
+            lambda number: {'text': f'Комментарий бенчмарка {number}'},
+        ),
+        Scenario(
+            'comments-detail', 'GET', f'{comments}{fixtures["comment"].id}/'
+        ),
+        Scenario('users-list', 'GET', '/api/v1/users/', 'admin'),
+        Scenario(
+            'users-detail',
+            'GET',
+            f'/api/v1/users/{fixtures["author"].username}/',
+            'admin',
+        ),
+        Scenario('users-me', 'GET', '/api/v1/users/me/', 'author'),
+        Scenario(
+            'auth-signup',
+            'POST',
+            '/api/v1/auth/signup/',
+            body=lambda number: {
+                'username': f'bench{number}',
+                'email': f'bench{number}@yamdb.fake',
+            },
+            status=200,
+        ),
+        Scenario(
+            'auth-signup:repeat',
+            'POST',
+            '/api/v1/auth/signup/',
+            body={
+                'username': fixtures['admin'].username,
+                'email': fixtures['admin'].email,
+            },
+            status=200,
+        ),
+        Scenario(
+            'auth-token',
+            'POST',
+            '/api/v1/auth/token/',
+            body={
+                'username': fixtures['admin'].username,
+                'confirmation_code': fixtures['code'],
+            },
+            status=200,
+        ),
+    )
+
+
+def iter_routes(patterns, prefix=''):
+    for pattern in patterns:
+        # regex routes are joined without `^`, as in ResolverMatch.route
+        route = prefix + str(pattern.pattern).lstrip('^')
+        if hasattr(pattern, 'url_patterns'):
+            yield from iter_routes(pattern.url_patterns, route)
+        else:
+            yield route
+
+
+def find_uncovered_routes(scenarios):
+    from django.urls import get_resolver, resolve
+
+    covered = set()
+    for scenario in scenarios:
+        path = scenario.path
+        path = path(0) if callable(path) else path
+        covered.add(resolve(path.partition('?')[0]).route)
+    return sorted(
+        route
+        for route in iter_routes(get_resolver().url_patterns)
+        if route.startswith('api/')
+        # format suffix duplicates of the router routes
+        and '(?P<format>' not in route and route not in covered
+    )
+
+
+def percentile(values, percent):
+    if len(values) < 2:
+        return values[0]
+    return statistics.quantiles(values, n=100, method='inclusive')[percent - 1]
+
+
+def measure(app, scenario, tokens, options, number=0):
+    from django.db import connection
+
+    statuses = Counter()
+    for _ in range(options.warmup):
+        statuses[call(app, scenario, number, tokens)] += 1
+        number += 1
+    timings = []
+    queries = []
+    counter = QueryCounter()
+    with connection.execute_wrapper(counter):
+        for _ in range(options.requests):
+            counter.count = 0
+            started = time.perf_counter()
+            statuses[call(app, scenario, number, tokens)] += 1
+            timings.append((time.perf_counter() - started) * 1000)
+            queries.append(counter.count)
+            number += 1
+    # tracemalloc slows every allocation down, so memory is measured on
+    # separate requests after the timed ones
+    peaks = []
+    tracemalloc.start()
+    try:
+        for _ in range(options.memory_requests):
+            tracemalloc.reset_peak()
+            current = tracemalloc.get_traced_memory()[0]
+            statuses[call(app, scenario, number, tokens)] += 1
+            peaks.append(tracemalloc.get_traced_memory()[1] - current)
+            number += 1
+    finally:
+        tracemalloc.stop()
+    expected = scenario.status or EXPECTED_STATUSES[scenario.method]
+    if set(statuses) != {expected}:
+        # timings of error responses say nothing about the endpoint
+        raise SystemExit(
+            f'{scenario.name}: ожидался статус {expected}, получены '
+            f'{dict(statuses)}'
+        )
+    return {
+        'method': scenario.method,
+        'status': dict(statuses),
+        'p50_ms': round(percentile(timings, 50), 3),
+        'p95_ms': round(percentile(timings, 95), 3),
+        'queries': max(queries),
+        'peak_kb': round(max(peaks) / 1024, 1) if peaks else None,
+    }
+
+
+def measure_rounds(app, scenario, tokens, options):
+    # the best of the rounds: noise only ever adds time
+    per_round = options.warmup + options.requests + options.memory_requests
+    runs = [
+        measure(app, scenario, tokens, options, number * per_round)
+        for number in range(options.rounds)
+    ]
+    result = runs[0]
+    for run in runs[1:]:
+        for metric in ('p50_ms', 'p95_ms', 'peak_kb'):
+            if run[metric] is not None:
+                result[metric] = min(result[metric], run[metric])
+        result['queries'] = max(result['queries'], run['queries'])
+        for code, count in run['status'].items():
+            result['status'][code] = result['status'].get(code, 0) + count
+    return result
+
+
+def compare(results, baseline, options):
+    # query counts are deterministic and always gate, time and memory only
+    # above both the relative threshold and the absolute noise floor
+    regressions = []
+    slowdowns = []
+    floors = {
+        'p50_ms': options.min_delta_ms,
+        'p95_ms': options.min_delta_ms,
+        'peak_kb': options.min_delta_kb,
+    }
+    for name, current in results['routes'].items():
+        previous = baseline['routes'].get(name)
+        if previous is None:
+            continue
+        if current['queries'] > previous['queries']:
+            regressions.append(
+                f'{name}: запросов к БД {previous["queries"]} -> '
+                f'{current["queries"]}'
+            )
+        for metric, floor in floors.items():
+            if current[metric] is None or previous[metric] is None:
+                continue
+            if (
+                current[metric] > previous[metric] * (1 + options.threshold)
+                and current[metric] - previous[metric] > floor
+            ):
+                slowdowns.append(
+                    f'{name}: {metric} {previous[metric]} -> '
+                    f'{current[metric]}'
+                )
+    return regressions, slowdowns
+
+
+def print_results(results):
+    print(
+        f'{"маршрут":<24} {"p50, мс":>9} {"p95, мс":>9} {"запросы":>8} '
+        f'{"память, КиБ":>12}  статусы'
+    )
+    for name, route in results['routes'].items():
+        print(
+            f'{name:<24} {route["p50_ms"]:>9} {route["p95_ms"]:>9} '
+            f'{route["queries"]:>8} {route["peak_kb"] or "-":>12}  '
+            f'{route["status"]}'
+        )
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    for name, default in DATASET.items():
+        parser.add_argument(f'--{name}', type=int, default=default)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--requests', type=int, default=50)
+    parser.add_argument('--warmup', type=int, default=5)
+    parser.add_argument('--memory-requests', type=int, default=5)
+    parser.add_argument(
+        '--rounds',
+        type=int,
+        default=1,
+        help='количество повторов замера, берётся лучший',
+    )
+    parser.add_argument(
+        '--cache',
+        action='store_true',
+        help='не отключать кэш ответов каталога',
+    )
+    parser.add_argument(
+        '--throttle',
+        action='store_true',
+        help='не отключать ограничение частоты запросов к /auth/',
+    )
+    parser.add_argument('--only', nargs='*', help='имена маршрутов')
+    parser.add_argument('--output', help='json файл для результатов')
+    parser.add_argument('--compare', help='json файл с базовыми результатами')
+    parser.add_argument(
+        '--threshold',
+        type=float,
+        default=0.25,
+        help='допустимый относительный рост времени и памяти',
+    )
+    parser.add_argument(
+        '--min-delta-ms',
+        type=float,
+        default=2.0,
+        help='рост p50/p95 меньше этого значения считается шумом',
+    )
+    parser.add_argument(
+        '--min-delta-kb',
+        type=float,
+        default=64.0,
+        help='рост памяти меньше этого значения считается шумом',
+    )
+    parser.add_argument(
+        '--strict',
+        action='store_true',
+        help='завершаться с кодом 1 и при росте времени или памяти',
+    )
+    return parser.parse_args()
+
+
+def main():
+    options = parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / 'api.sqlite3'
+        setup_django(db_path)
+        from django.conf import settings
+        from django.core.management import call_command
+        from django.core.wsgi import get_wsgi_application
+
+        use_database(db_path)
+        settings.EMAIL_BACKEND = (
+            'django.core.mail.backends.locmem.EmailBackend'
+        )
+        settings.CATALOG_CACHE_ENABLED = options.cache
+        if not options.throttle:
+            # the throttles read this dict, rates of None turn them off
+            rates = settings.REST_FRAMEWORK['DEFAULT_THROTTLE_RATES']
+            rates.update(dict.fromkeys(rates))
+        dataset = {name: getattr(options, name) for name in DATASET}
+        call_command(
+            'generate_data', seed=options.seed, stdout=StringIO(), **dataset
+        )
+        fixtures = build_fixtures(
+            (options.warmup + options.requests + options.memory_requests)
+            * options.rounds
+        )
+        scenarios = build_scenarios(fixtures)
+        for route in find_uncovered_routes(scenarios):
+            print(f'маршрут без сценария: {route}', file=sys.stderr)
+        if options.only:
+            scenarios = [s for s in scenarios if s.name in options.only]
+        app = get_wsgi_application()
+        results = {
+            'meta': {
+                'dataset': dataset,
+                'seed': options.seed,
+                'requests': options.requests,
+                'rounds': options.rounds,
+                'cache': options.cache,
+                'throttle': options.throttle,
+                'python': platform.python_version(),
+            },
+            'routes': {
+                scenario.name: measure_rounds(
+                    app, scenario, fixtures['tokens'], options
+                )
+                for scenario in scenarios
+            },
+        }
+    print_results(results)
+    if options.output:
+        with open(options.output, 'w') as output:
+            json.dump(results, output, indent=2, ensure_ascii=False)
+    if options.compare:
+        with open(options.compare) as baseline:
+            regressions, slowdowns = compare(
+                results, json.load(baseline), options
+            )
+        for regression in regressions:
+            print(f'регрессия: {regression}')
+        for slowdown in slowdowns:
+            print(f'замедление: {slowdown}')
+        if regressions or (slowdowns and options.strict):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,135 @@
+# Compare loadcsv throughput with and without --fast, and of --fast with
+# --workers N parsing processes against one, on the bundled static/data
+# fixtures scaled up N times:
+#
+#     python benchmarks/bench_loadcsv.py --scale 1000 --workers 4
+import argparse
+import csv
+import json
+import sys
+import tempfile
+import time
+from io import StringIO
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.utils import CSV_DIR, setup_django, use_database  # noqa: E402
+
+# foreign key columns and the files they point to
+REFERENCES = {
+    'titles': {'category': 'category'},
+    'genre_title': {'title_id': 'titles', 'genre_id': 'genre'},
+    'review': {'title_id': 'titles', 'author': 'users'},
+    'comments': {'review_id': 'review', 'author': 'users'},
+}
+UNIQUE_COLUMNS = {
+    'users': ('username', 'email'),
+    'category': ('slug',),
+    'genre': ('slug',),
+}
+
+
+def read_csv(f_path):
+    with open(f_path, newline='', encoding='utf-8') as csvfile:
+        return list(csv.DictReader(csvfile))
+
+
+def scale_csv(source_dir, target_dir, scale):
+    sources = {
+        f_path.stem: read_csv(f_path) for f_path in source_dir.glob('*.csv')
+    }
+    # replica ids are shifted by the max id of the file, so they never
+    # overlap with the ids of other replicas
+    offsets = {
+        f_name: max(int(row['id']) for row in rows)
+        for f_name, rows in sources.items()
+    }
+    total = 0
+    for f_name, rows in sources.items():
+        references = REFERENCES.get(f_name, {})
+        unique_columns = UNIQUE_COLUMNS.get(f_name, ())
+        with open(
+            target_dir / f'{f_name}.csv', 'w', newline='', encoding='utf-8'
+        ) as csvfile:
+            writer = csv.DictWriter(csvfile, fieldnames=rows[0].keys())
+            writer.writeheader()
+            for replica in range(scale):
+                for row in rows:
+                    row = dict(row)
+                    row['id'] = int(row['id']) + replica * offsets[f_name]
+                    for column, target in references.items():
+                        row[column] = (
+                            int(row[column]) + replica * offsets[target]
+                        )
+                    for column in unique_columns:
+                        row[column] = f'{replica}_{row[column]}'
+                    writer.writerow(row)
+            total += len(rows) * scale
+    return total
+
+
+def run(csv_dir, db_path, **options):
+    from django.core.management import call_command
+
+    use_database(db_path)
+    started = time.perf_counter()
+    call_command('loadcsv', str(csv_dir), stdout=StringIO(), **options)
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--scale', type=int, default=1000)
+    parser.add_argument('--batch-size', type=int, default=1000)
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=1,
+        help='сравнить --fast с N процессами разбора и с одним',
+    )
+    parser.add_argument('--output', help='json file for the results')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        setup_django(tmp / 'setup.sqlite3')
+        csv_dir = tmp / 'data'
+        csv_dir.mkdir()
+        rows = scale_csv(CSV_DIR, csv_dir, args.scale)
+        variants = [('default', {}), ('fast', {'fast': True})]
+        if args.workers > 1:
+            variants.append(
+                ('workers', {'fast': True, 'workers': args.workers})
+            )
+        results = {}
+        for variant, options in variants:
+            elapsed = run(
+                csv_dir,
+                tmp / f'{variant}.sqlite3',
+                batch_size=args.batch_size,
+                **options,
+            )
+            results[variant] = {
+                'rows': rows,
+                'seconds': round(elapsed, 3),
+                'rows_per_second': round(rows / elapsed),
+            }
+            print(
+                f'{variant:>8}: {rows} строк за {elapsed:.2f} с, '
+                f'{rows / elapsed:.0f} строк/с'
+            )
+    fast = results['fast']['seconds']
+    print(f'ускорение --fast: {results["default"]["seconds"] / fast:.2f}x')
+    if 'workers' in results:
+        print(
+            f'ускорение --workers {args.workers}: '
+            f'{fast / results["workers"]["seconds"]:.2f}x'
+        )
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump(results, output, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+# Per-request time of the API with the stock Django middleware and with
+# the path-aware one that skips sessions, CSRF, messages and frame options
+# for /api/:
+#
+#     python benchmarks/bench_middleware.py --requests 2000
+import argparse
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.bench_api import make_environ  # noqa: E402
+from benchmarks.utils import setup_django, use_database  # noqa: E402
+
+STOCK_MIDDLEWARE = [
+    'django.middleware.security.SecurityMiddleware',
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.middleware.common.CommonMiddleware',
+    'django.middleware.csrf.CsrfViewMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'django.contrib.messages.middleware.MessageMiddleware',
+    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+]
+
+PATHS = (
+    ('anonymous', '/api/v1/genres/'),
+    ('jwt', '/api/v1/users/me/'),
+)
+
+
+def request(app, path, token):
+    result = app(make_environ('GET', path, token), lambda *args: None)
+    try:
+        b''.join(result)
+    finally:
+        result.close()
+
+
+def measure(app, path, token, requests):
+    started = time.perf_counter()
+    for _ in range(requests):
+        request(app, path, token)
+    return (time.perf_counter() - started) / requests * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--rounds', type=int, default=5)
+    options = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / 'middleware.sqlite3'
+        setup_django(db_path)
+        from django.contrib.auth import get_user_model
+        from django.core.handlers.wsgi import WSGIHandler
+        from django.test.utils import override_settings
+        from rest_framework_simplejwt.tokens import AccessToken
+
+        use_database(db_path)
+        user = get_user_model().objects.create(
+            username='bench', email='bench@yamdb.fake'
+        )
+        token = str(AccessToken.for_user(user))
+        with override_settings(MIDDLEWARE=STOCK_MIDDLEWARE):
+            stock = WSGIHandler()
+        lean = WSGIHandler()
+        for name, path in PATHS:
+            auth = token if name == 'jwt' else None
+            timings = {'stock': [], 'lean': []}
+            for app in (stock, lean):
+                measure(app, path, auth, options.requests // 10)
+            # the variants alternate, so drift of the machine hits both
+            for _ in range(options.rounds):
+                timings['stock'].append(
+                    measure(stock, path, auth, options.requests)
+                )
+                timings['lean'].append(
+                    measure(lean, path, auth, options.requests)
+                )
+            stock_time = statistics.median(timings['stock'])
+            lean_time = statistics.median(timings['lean'])
+            print(
+                f'{path} ({name}): {stock_time:.0f} мкс -> '
+                f'{lean_time:.0f} мкс на запрос, экономия '
+                f'{stock_time - lean_time:.0f} мкс '
+                f'({(stock_time - lean_time) / stock_time:.0%})'
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,28 @@
+import os
+import sys
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+PROJECT_DIR = BASE_DIR / 'api_yamdb'
+CSV_DIR = PROJECT_DIR / 'static' / 'data'
+
+
+def setup_django(db_path):
+    # benchmarks run against their own sqlite files, never db.sqlite3
+    sys.path.insert(0, str(PROJECT_DIR))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api_yamdb.settings')
+    os.environ.setdefault('SECRET_KEY', 'benchmark')
+    import django
+    from django.conf import settings
+
+    settings.DATABASES['default']['NAME'] = str(db_path)
+    django.setup()
+
+
+def use_database(db_path):
+    from django.core.management import call_command
+    from django.db import connection
+
+    connection.close()
+    connection.settings_dict['NAME'] = str(db_path)
+    call_command('migrate', run_syncdb=True, verbosity=0)
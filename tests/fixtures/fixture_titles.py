@@ -0,0 +1,52 @@
+import pytest
+
+from reviews.models import Category, Genre, GenreTitle, Review, Title
+
+
+@pytest.fixture
+def many_titles():
+    category = Category.objects.create(name='Фильм', slug='films')
+    genres = [
+        Genre.objects.create(name=f'Жанр {idx}', slug=f'genre-{idx}')
+        for idx in range(3)
+    ]
+    Title.objects.bulk_create(
+        Title(name=f'Произведение {idx:03}', year=2000, category=category)
+        for idx in range(120)
+    )
+    titles = Title.objects.order_by('id')
+    GenreTitle.objects.bulk_create(
+        GenreTitle(title=title, genre=genre)
+        for title in titles
+        for genre in genres
+    )
+    return titles
+
+
+@pytest.fixture
+def multi_genre_titles(django_user_model):
+    # every title has all the genres and a review from every author, the
+    # shape that multiplied rows when rating was aggregated per request
+    category = Category.objects.create(name='Книги', slug='books')
+    genres = [
+        Genre.objects.create(name=f'Жанр {idx}', slug=f'multi-{idx}')
+        for idx in range(4)
+    ]
+    authors = [
+        django_user_model.objects.create(
+            username=f'author{idx}', email=f'author{idx}@yamdb.fake'
+        )
+        for idx in range(10)
+    ]
+    titles = []
+    for idx in range(30):
+        title = Title.objects.create(
+            name=f'Книга {idx:02}', year=2000, category=category
+        )
+        title.genre.set(genres)
+        for score, author in enumerate(authors, 1):
+            Review.objects.create(
+                title=title, author=author, text='Отзыв', score=score
+            )
+        titles.append(title)
+    return titles, genres, authors
@@ -0,0 +1,68 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.management import call_command
+
+from reviews.models import Title
+from tests.utils import create_reviews
+
+
+@pytest.mark.django_db(transaction=True)
+class Test08Rating:
+
+    def test_01_rating_follows_review_changes(self, admin_client, admin,
+                                              user_client, user):
+        reviews, titles = create_reviews(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+        url = f'/api/v1/titles/{titles[0]["id"]}/'
+        assert admin_client.get(url).json()['rating'] == 5
+
+        response = user_client.patch(
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/{reviews[1]["id"]}/',
+            data={'score': 1}
+        )
+        assert response.status_code == HTTPStatus.OK
+        assert admin_client.get(url).json()['rating'] == 3, (
+            'Проверьте, что рейтинг произведения пересчитывается при '
+            'изменении оценки отзыва.'
+        )
+
+        admin_client.delete(
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/{reviews[0]["id"]}/'
+        )
+        assert admin_client.get(url).json()['rating'] == 1, (
+            'Проверьте, что рейтинг произведения пересчитывается при '
+            'удалении отзыва.'
+        )
+
+    def test_02_rebuildratings_command(self, admin_client, admin):
+        _, titles = create_reviews(admin_client, {admin: admin_client})
+        Title.objects.update(score_sum=0, score_count=0)
+
+        call_command('rebuildratings')
+
+        title = Title.objects.get(id=titles[0]['id'])
+        assert (title.score_sum, title.score_count) == (5, 1), (
+            'Проверьте, что команда `rebuildratings` пересчитывает рейтинг '
+            'по существующим отзывам.'
+        )
+
+    def test_03_title_save_keeps_rating(self, admin_client, admin,
+                                        user_client, user):
+        _, titles = create_reviews(admin_client, {admin: admin_client})
+        # loaded before the next review, as by a PATCH or the admin
+        title = Title.objects.get(id=titles[0]['id'])
+        response = user_client.post(
+            f'/api/v1/titles/{title.id}/reviews/',
+            data={'text': 'Отзыв', 'score': 1},
+        )
+        assert response.status_code == HTTPStatus.CREATED
+        title.name = 'Новое название'
+        title.save()
+        title.refresh_from_db()
+        assert (title.score_sum, title.score_count) == (6, 2), (
+            'Проверьте, что сохранение произведения не перезаписывает '
+            'сумму и количество оценок.'
+        )
+        assert title.name == 'Новое название'
@@ -0,0 +1,174 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.v1.views import TitleViewSet
+from reviews.models import Comment, Review, Title
+from tests.utils import create_comments, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test09Queries:
+
+    def test_01_title_list_query_budget(self, client, many_titles,
+                                        django_assert_num_queries):
+        # ETag aggregate + count + titles with categories + genres
+        with django_assert_num_queries(4):
+            response = client.get('/api/v1/titles/?limit=100')
+        assert len(response.json()['results']) == 100, (
+            'Проверьте, что список произведений возвращает все объекты '
+            'страницы.'
+        )
+
+    def test_02_title_detail_query_budget(self, client, many_titles,
+                                          django_assert_num_queries):
+        with django_assert_num_queries(3):
+            response = client.get(f'/api/v1/titles/{many_titles[0].id}/')
+        assert len(response.json()['genre']) == 3
+
+    def test_03_genre_filter_scales_with_titles(self, client,
+                                                multi_genre_titles,
+                                                django_assert_num_queries):
+        titles, genres, authors = multi_genre_titles
+        # rows the per-request Avg('reviews__score') had to group
+        legacy_rows = Title.objects.filter(
+            genre__slug=genres[0].slug
+        ).values_list('id', 'reviews__id')
+        assert len(legacy_rows) == len(titles) * len(authors)
+
+        queryset = TitleViewSet.queryset.filter(genre__slug=genres[0].slug)
+        sql = str(queryset.query)
+        assert 'GROUP BY' not in sql and 'reviews_review' not in sql, (
+            'Проверьте, что рейтинг произведений не вычисляется '
+            'агрегированием отзывов при каждом запросе.'
+        )
+        assert len(queryset) == len(titles)
+
+        with django_assert_num_queries(4):
+            response = client.get(
+                f'/api/v1/titles/?genre={genres[0].slug}&limit=100'
+            )
+        data = response.json()
+        assert data['count'] == len(titles)
+        assert {title['rating'] for title in data['results']} == {5}
+
+    def test_04_review_post_skips_duplicate_precheck(self, admin_client,
+                                                     user_client):
+        titles, _, _ = create_titles(admin_client)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        with CaptureQueriesContext(connection) as context:
+            response = user_client.post(url, data={'text': 'Да', 'score': 7})
+        assert response.status_code == HTTPStatus.CREATED
+        selects = [
+            query['sql'] for query in context.captured_queries
+            if query['sql'].startswith('SELECT')
+        ]
+        assert not any('FROM "reviews_review"' in sql for sql in selects), (
+            'Проверьте, что уникальность отзыва проверяется ограничением '
+            'базы данных, без отдельного запроса.'
+        )
+        assert sum('FROM "reviews_title"' in sql for sql in selects) == 1
+
+        response = user_client.post(url, data={'text': 'Ещё', 'score': 1})
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+
+    def test_05_comment_scoped_to_title(self, admin_client, admin):
+        comments, reviews, titles = create_comments(
+            admin_client, {admin: admin_client}
+        )
+        url = (
+            f'/api/v1/titles/{titles[1]["id"]}/reviews/{reviews[0]["id"]}/'
+            'comments/'
+        )
+        assert admin_client.get(url).status_code == HTTPStatus.NOT_FOUND, (
+            'Проверьте, что комментарии доступны только по адресу '
+            'произведения, к которому относится отзыв.'
+        )
+        response = admin_client.post(url, data={'text': 'Мимо'})
+        assert response.status_code == HTTPStatus.NOT_FOUND
+
+    def test_06_review_and_comment_lists_fetch_authors(
+        self, client, multi_genre_titles, django_assert_num_queries
+    ):
+        titles, _, authors = multi_genre_titles
+        review = titles[0].reviews.first()
+        Comment.objects.bulk_create(
+            Comment(review=review, author=author, text=f'Комментарий {idx}')
+            for idx, author in enumerate(authors * 10)
+        )
+        # title, ETag aggregate, count and reviews with authors
+        with django_assert_num_queries(4):
+            response = client.get(
+                f'/api/v1/titles/{titles[0].id}/reviews/?limit=100'
+            )
+        assert len(response.json()['results']) == len(authors)
+
+        with django_assert_num_queries(4):
+            response = client.get(
+                f'/api/v1/titles/{titles[0].id}/reviews/{review.id}/'
+                'comments/?limit=100'
+            )
+        assert len(response.json()['results']) == 100, (
+            'Проверьте, что авторы комментариев загружаются тем же запросом, '
+            'что и комментарии.'
+        )
+
+    def test_07_object_permission_uses_author_id(
+        self, user_client, user, multi_genre_titles,
+        django_assert_num_queries
+    ):
+        titles, _, _ = multi_genre_titles
+        review = Review.objects.create(
+            title=titles[0], author=user, text='Мой отзыв', score=5
+        )
+        url = f'/api/v1/titles/{titles[0].id}/reviews/{review.id}/'
+        with CaptureQueriesContext(connection) as context:
+            response = user_client.patch(url, data={'text': 'Новый текст'})
+        assert response.status_code == HTTPStatus.OK
+        user_selects = [
+            query for query in context.captured_queries
+            if query['sql'].startswith('SELECT')
+            and 'FROM "users_user"' in query['sql']
+        ]
+        assert len(user_selects) == 1, (
+            'Проверьте, что проверка авторства не загружает автора объекта.'
+        )
+
+    def test_08_signup_round_trips(self, client, django_user_model):
+        def user_queries(context):
+            return [
+                query['sql'] for query in context.captured_queries
+                if '"users_user"' in query['sql']
+            ]
+
+        data = {'username': 'new_user', 'email': 'new_user@yamdb.fake'}
+        with CaptureQueriesContext(connection) as context:
+            response = client.post('/api/v1/auth/signup/', data=data)
+        assert response.status_code == HTTPStatus.OK
+        assert response.json() == data
+        assert len(user_queries(context)) == 2, (
+            'Проверьте, что регистрация нового пользователя выполняет один '
+            'запрос на проверку и один на создание пользователя.'
+        )
+        # BEGIN and the outbox email saved in the same transaction
+        assert len(context.captured_queries) <= 4
+        assert django_user_model.objects.filter(**data).exists()
+
+        with CaptureQueriesContext(connection) as context:
+            response = client.post('/api/v1/auth/signup/', data=data)
+        assert response.status_code == HTTPStatus.OK
+        assert len(user_queries(context)) == 1, (
+            'Проверьте, что повторная регистрация проверяет пользователя '
+            'одним запросом.'
+        )
+        assert len(context.captured_queries) <= 2
+
+        with CaptureQueriesContext(connection) as context:
+            response = client.post(
+                '/api/v1/auth/signup/',
+                data={'username': 'new_user', 'email': 'other@yamdb.fake'},
+            )
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        assert len(context.captured_queries) == 1
@@ -0,0 +1,36 @@
+from http import HTTPStatus
+
+import pytest
+
+
+@pytest.mark.django_db(transaction=True)
+class Test10CursorPagination:
+    url = '/api/v1/titles/'
+
+    def test_01_cursor_walks_all_titles(self, client, many_titles):
+        response = client.get(f'{self.url}?pagination=cursor&limit=50')
+        assert response.status_code == HTTPStatus.OK
+        names = []
+        pages = 0
+        while True:
+            data = response.json()
+            assert 'count' not in data, (
+                'Проверьте, что курсорная пагинация не считает общее '
+                'количество объектов.'
+            )
+            names.extend(title['name'] for title in data['results'])
+            pages += 1
+            if not data['next']:
+                break
+            response = client.get(data['next'])
+        assert pages == 3
+        assert names == sorted(title.name for title in many_titles), (
+            'Проверьте, что курсорная пагинация возвращает все произведения '
+            'по одному разу в порядке названия.'
+        )
+
+    def test_02_limit_offset_still_default(self, client, many_titles):
+        data = client.get(f'{self.url}?limit=10&offset=110').json()
+        assert data['count'] == 120
+        assert len(data['results']) == 10
+        assert data['next'] is None
@@ -0,0 +1,63 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.management import call_command
+
+from tests.utils import create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test11TitleSearch:
+    url = '/api/v1/titles/'
+
+    def search(self, client, text):
+        response = client.get(self.url, {'search': text})
+        assert response.status_code == HTTPStatus.OK
+        return [title['name'] for title in response.json()['results']]
+
+    def test_01_search_by_name_and_description(self, client, admin_client):
+        create_titles(admin_client)
+        assert self.search(client, 'терминатор') == ['Терминатор'], (
+            'Проверьте, что параметр `search` ищет произведения по названию.'
+        )
+        assert self.search(client, 'yippie') == ['Крепкий орешек'], (
+            'Проверьте, что параметр `search` ищет произведения по описанию.'
+        )
+        assert self.search(client, 'крепк') == ['Крепкий орешек'], (
+            'Проверьте, что параметр `search` находит слова по префиксу.'
+        )
+        assert self.search(client, '"*)') == []
+
+    def test_02_index_follows_title_changes(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        admin_client.patch(
+            f'{self.url}{titles[0]["id"]}/', data={'name': 'Чужой'}
+        )
+        assert self.search(client, 'терминатор') == []
+        assert self.search(client, 'чужой') == ['Чужой']
+
+        admin_client.delete(f'{self.url}{titles[0]["id"]}/')
+        assert self.search(client, 'чужой') == []
+
+    def test_03_search_ranks_results(self, client, admin_client):
+        admin_client.post('/api/v1/categories/',
+                          data={'name': 'Фильм', 'slug': 'films'})
+        admin_client.post('/api/v1/genres/',
+                          data={'name': 'Драма', 'slug': 'drama'})
+        for name, description in (
+            ('Орешек', 'Про орешки'),
+            ('Крепкий орешек', 'Про орешек, который крепкий'),
+        ):
+            admin_client.post(self.url, data={
+                'name': name, 'year': 1988, 'genre': ['drama'],
+                'category': 'films', 'description': description,
+            })
+        assert self.search(client, 'крепкий орешек') == ['Крепкий орешек']
+        assert self.search(client, 'орешек')[0] == 'Крепкий орешек', (
+            'Проверьте, что результаты поиска упорядочены по релевантности.'
+        )
+
+    def test_04_rebuild_command(self, client, admin_client):
+        create_titles(admin_client)
+        call_command('rebuildsearchindex')
+        assert self.search(client, 'терминатор') == ['Терминатор']
@@ -0,0 +1,88 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import transaction
+
+from api.v1 import cache
+from reviews.models import Genre
+from tests.utils import create_reviews, create_single_review
+
+
+@pytest.mark.django_db(transaction=True)
+class Test12CatalogCache:
+
+    def test_01_anonymous_list_is_cached(self, client, admin_client,
+                                         django_assert_num_queries):
+        admin_client.post(
+            '/api/v1/genres/', data={'name': 'Драма', 'slug': 'drama'}
+        )
+        client.get('/api/v1/genres/')
+        hits = cache.stats['hit']
+        with django_assert_num_queries(0):
+            response = client.get('/api/v1/genres/')
+        assert response.status_code == HTTPStatus.OK
+        assert response.json()['count'] == 1
+        assert cache.stats['hit'] == hits + 1
+
+    def test_02_writes_invalidate_cached_responses(self, client,
+                                                   admin_client, admin,
+                                                   user_client):
+        reviews, titles = create_reviews(admin_client, {admin: admin_client})
+        url = f'/api/v1/titles/{titles[0]["id"]}/'
+        assert client.get(url).json()['rating'] == 5
+
+        create_single_review(user_client, titles[0]['id'], 'Так себе', 1)
+        assert client.get(url).json()['rating'] == 3, (
+            'Проверьте, что новый отзыв сбрасывает закэшированный ответ '
+            'для произведения.'
+        )
+
+        admin_client.delete('/api/v1/genres/horror/')
+        title = client.get(url).json()
+        assert 'horror' not in {genre['slug'] for genre in title['genre']}
+
+        admin_client.post(
+            '/api/v1/categories/', data={'name': 'Музыка', 'slug': 'music'}
+        )
+        assert client.get('/api/v1/categories/').json()['count'] == 3
+
+    def test_03_authenticated_requests_bypass_cache(self, admin_client):
+        misses = cache.stats['miss']
+        admin_client.get('/api/v1/categories/')
+        admin_client.get('/api/v1/categories/')
+        assert cache.stats['miss'] == misses
+
+    def test_04_cache_can_be_disabled(self, client, settings):
+        settings.CATALOG_CACHE_ENABLED = False
+        hits, misses = cache.stats['hit'], cache.stats['miss']
+        client.get('/api/v1/categories/')
+        client.get('/api/v1/categories/')
+        assert (cache.stats['hit'], cache.stats['miss']) == (hits, misses)
+
+    def test_05_host_is_part_of_the_key(self, client):
+        Genre.objects.bulk_create(
+            Genre(name=f'Жанр {idx}', slug=f'genre-{idx}')
+            for idx in range(20)
+        )
+        url = '/api/v1/genres/?limit=5'
+        poisoned = client.get(url, HTTP_HOST='evil.example').json()
+        assert poisoned['next'].startswith('http://evil.example/')
+        response = client.get(url)
+        assert response.json()['next'].startswith('http://testserver/'), (
+            'Проверьте, что ответ, закэшированный для другого заголовка '
+            '`Host`, не отдаётся с чужими ссылками пагинации.'
+        )
+
+    def test_06_versions_are_bumped_after_commit(self):
+        before = cache.get_versions((Genre,))
+        with transaction.atomic():
+            Genre.objects.create(name='Драма', slug='drama')
+            assert cache.get_versions((Genre,)) == before, (
+                'Проверьте, что версия кэша меняется только после фиксации '
+                'транзакции, иначе другие процессы закэшируют старые данные '
+                'под новой версией.'
+            )
+        after = cache.get_versions((Genre,))
+        assert after != before
+        Genre.objects.create(name='Комедия', slug='comedy')
+        assert cache.get_versions((Genre,)) not in (before, after)
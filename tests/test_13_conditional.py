@@ -0,0 +1,153 @@
+from http import HTTPStatus
+
+import pytest
+from django.apps import apps
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from api.v1 import cache
+from reviews.models import Comment, Genre, Review, Title
+from tests.utils import create_comments, create_reviews
+
+
+def backdate(*models):
+    # moves every timestamp an hour back, so `Last-Modified` of later
+    # changes differs even within the same second
+    past = timezone.now() - timezone.timedelta(hours=1)
+    for model in models:
+        model.objects.update(updated_at=past)
+    cache.get_cache().clear()
+    for model in apps.get_app_config('reviews').get_models():
+        cache.get_cache().set(
+            cache.CHANGED_KEY.format(model._meta.label_lower),
+            past.timestamp(),
+            timeout=None,
+        )
+
+
+@pytest.mark.django_db(transaction=True)
+class Test13ConditionalGet:
+
+    def test_01_etag_and_last_modified(self, client, admin_client, admin,
+                                       django_assert_num_queries):
+        reviews, titles = create_reviews(admin_client, {admin: admin_client})
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        response = client.get(url)
+        assert response.status_code == HTTPStatus.OK
+        etag = response['ETag']
+        assert etag.startswith('"'), (
+            f'Проверьте, что ответ на GET-запрос к `{url}` содержит сильный '
+            'заголовок `ETag`.'
+        )
+        assert response.has_header('Last-Modified')
+
+        with django_assert_num_queries(2):
+            response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.NOT_MODIFIED
+        assert response['ETag'] == etag
+
+        response = client.get(
+            url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+        )
+        assert response.status_code == HTTPStatus.NOT_MODIFIED
+
+        admin_client.patch(f'{url}{reviews[0]["id"]}/', data={'score': 9})
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что изменение отзыва меняет `ETag` списка отзывов.'
+        )
+        assert response['ETag'] != etag
+
+    def test_02_title_etag_follows_rating(self, client, admin_client, admin,
+                                          user_client, user):
+        _, titles = create_reviews(admin_client, {admin: admin_client})
+        url = f'/api/v1/titles/{titles[0]["id"]}/'
+        etag = client.get(url)['ETag']
+        assert client.get(
+            url, HTTP_IF_NONE_MATCH=etag
+        ).status_code == HTTPStatus.NOT_MODIFIED
+
+        user_client.post(f'{url}reviews/', data={'text': 'Нет', 'score': 1})
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK
+        assert response.json()['rating'] == 3
+
+    def test_03_comments_and_catalog(self, client, admin_client, admin):
+        comments, reviews, titles = create_comments(
+            admin_client, {admin: admin_client}
+        )
+        for url in (
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/{reviews[0]["id"]}'
+            f'/comments/{comments[0]["id"]}/',
+            '/api/v1/genres/',
+            '/api/v1/categories/',
+            '/api/v1/titles/',
+        ):
+            etag = client.get(url)['ETag']
+            response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+            assert response.status_code == HTTPStatus.NOT_MODIFIED, (
+                f'Проверьте, что GET-запрос к `{url}` с совпадающим '
+                '`If-None-Match` возвращает ответ со статусом 304.'
+            )
+
+    def test_04_delete_changes_last_modified(self, client, admin_client,
+                                             admin, user_client, user):
+        comments, reviews, titles = create_comments(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+        url = (
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/{reviews[0]["id"]}'
+            '/comments/'
+        )
+        backdate(Comment)
+        response = client.get(url)
+        last_modified, etag = response['Last-Modified'], response['ETag']
+        response = admin_client.delete(f'{url}{comments[0]["id"]}/')
+        assert response.status_code == HTTPStatus.NO_CONTENT
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что удаление комментария меняет `ETag` списка '
+            'комментариев.'
+        )
+        response = client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что удаление комментария меняет `Last-Modified` '
+            'списка комментариев.'
+        )
+        assert response.json()['count'] == 1
+
+    def test_05_related_change_changes_last_modified(self, client,
+                                                     admin_client, admin):
+        _, titles = create_reviews(admin_client, {admin: admin_client})
+        url = f'/api/v1/titles/{titles[0]["id"]}/'
+        backdate(Title, Review)
+        for api_client in (client, admin_client):
+            last_modified = api_client.get(url)['Last-Modified']
+            assert api_client.get(
+                url, HTTP_IF_MODIFIED_SINCE=last_modified
+            ).status_code == HTTPStatus.NOT_MODIFIED
+        genre = Genre.objects.filter(title__id=titles[0]['id']).first()
+        genre.name = 'Новое название'
+        genre.save()
+        for api_client in (client, admin_client):
+            response = api_client.get(
+                url, HTTP_IF_MODIFIED_SINCE=last_modified
+            )
+            assert response.status_code == HTTPStatus.OK, (
+                'Проверьте, что изменение жанра меняет `Last-Modified` '
+                'произведения.'
+            )
+
+    def test_06_validators_do_not_count_rows(self, client, admin_client,
+                                             admin):
+        create_reviews(admin_client, {admin: admin_client})
+        with CaptureQueriesContext(connection) as context:
+            response = client.get('/api/v1/titles/?pagination=cursor')
+        assert response.status_code == HTTPStatus.OK
+        assert not any(
+            'COUNT(' in query['sql'] for query in context.captured_queries
+        ), (
+            'Проверьте, что `ETag` курсорной пагинации строится без '
+            'подсчёта всех строк.'
+        )
@@ -0,0 +1,212 @@
+import csv
+import os
+import shutil
+from http import HTTPStatus
+from io import StringIO
+
+import pytest
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.management.commands.loadcsv import (FILENAME_TO_MODEL_MAP,
+                                                 get_load_order)
+from reviews import search
+from reviews.models import Title
+from tests.conftest import MANAGE_PATH
+
+CSV_DIR = os.path.join(MANAGE_PATH, 'static', 'data')
+
+
+def count_csv_rows(f_name):
+    with open(os.path.join(CSV_DIR, f'{f_name}.csv'), newline='',
+              encoding='utf-8') as csvfile:
+        return sum(1 for _ in csv.DictReader(csvfile))
+
+
+@pytest.mark.django_db(transaction=True)
+class Test14LoadCsv:
+
+    def test_01_loads_bundled_data_in_batches(self):
+        with CaptureQueriesContext(connection) as context:
+            call_command('loadcsv', CSV_DIR, batch_size=10, stdout=StringIO())
+        for f_name, model in FILENAME_TO_MODEL_MAP:
+            assert model.objects.count() == count_csv_rows(f_name), (
+                f'Проверьте, что команда `loadcsv` загружает все строки '
+                f'файла {f_name}.csv.'
+            )
+        selects = [
+            query['sql'] for query in context.captured_queries
+            if query['sql'].startswith('SELECT')
+        ]
+        assert not any(
+            'FROM "users_user"' in sql or 'FROM "reviews_category"' in sql
+            for sql in selects
+        ), (
+            'Проверьте, что команда `loadcsv` присваивает внешние ключи по '
+            'id, не загружая связанные объекты.'
+        )
+        title = Title.objects.get(id=1)
+        assert title.category_id == 1
+        assert title.rating is not None
+
+    def test_02_parallel_parsing_loads_the_same_data(self):
+        call_command('loadcsv', CSV_DIR, batch_size=10, workers=3,
+                     stdout=StringIO())
+        for f_name, model in FILENAME_TO_MODEL_MAP:
+            assert model.objects.count() == count_csv_rows(f_name), (
+                f'Проверьте, что команда `loadcsv --workers` загружает все '
+                f'строки файла {f_name}.csv.'
+            )
+
+    def test_03_load_order_follows_foreign_keys(self):
+        order = [f_name for f_name, _ in get_load_order()]
+        for dependency, dependent in (
+            ('users', 'review'), ('category', 'titles'),
+            ('titles', 'genre_title'), ('genre', 'genre_title'),
+            ('review', 'comments'),
+        ):
+            assert order.index(dependency) < order.index(dependent)
+        reversed_map = tuple(reversed(FILENAME_TO_MODEL_MAP))
+        assert [f_name for f_name, _ in get_load_order(reversed_map)][-1] == (
+            'comments'
+        )
+
+    def test_04_upsert_writes_only_changed_rows(self, tmp_path):
+        call_command('loadcsv', CSV_DIR, mode='upsert', stdout=StringIO())
+        title = Title.objects.get(id=1)
+        assert Title.objects.count() == count_csv_rows('titles')
+
+        with CaptureQueriesContext(connection) as context:
+            call_command('loadcsv', CSV_DIR, mode='upsert', stdout=StringIO())
+        writes = [
+            query['sql'] for query in context.captured_queries
+            if query['sql'].startswith(('INSERT', 'UPDATE'))
+        ]
+        assert not writes, (
+            'Проверьте, что `loadcsv --mode=upsert` не записывает '
+            'неизменившиеся строки.'
+        )
+
+        csv_dir = tmp_path / 'data'
+        csv_dir.mkdir()
+        with open(os.path.join(CSV_DIR, 'titles.csv'), newline='',
+                  encoding='utf-8') as source:
+            rows = list(csv.DictReader(source))
+        rows[0]['name'] = 'Новое название'
+        rows.append({'id': '1000', 'name': 'Новинка', 'year': '2020',
+                     'category': '1'})
+        with open(csv_dir / 'titles.csv', 'w', newline='',
+                  encoding='utf-8') as target:
+            writer = csv.DictWriter(target, fieldnames=rows[0].keys())
+            writer.writeheader()
+            writer.writerows(rows)
+
+        output = StringIO()
+        call_command('loadcsv', str(csv_dir), mode='upsert', stdout=output)
+        assert 'записано 2' in output.getvalue()
+        updated = Title.objects.get(id=1)
+        assert updated.name == 'Новое название'
+        assert updated.updated_at > title.updated_at
+        assert Title.objects.filter(id=1000).exists()
+
+    def test_05_fast_import_restores_indexes_and_pragmas(self):
+        def session_state():
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT name FROM sqlite_master WHERE type = 'index' "
+                    "ORDER BY name"
+                )
+                indexes = [row[0] for row in cursor.fetchall()]
+                cursor.execute('PRAGMA synchronous')
+                synchronous = cursor.fetchone()[0]
+            return indexes, synchronous
+
+        before = session_state()
+        call_command('loadcsv', CSV_DIR, fast=True, stdout=StringIO())
+        assert session_state() == before, (
+            'Проверьте, что `loadcsv --fast` восстанавливает индексы и '
+            'настройки соединения после загрузки.'
+        )
+        for f_name, model in FILENAME_TO_MODEL_MAP:
+            assert model.objects.count() == count_csv_rows(f_name)
+
+    def test_06_upsert_refreshes_changed_titles_only(self, tmp_path):
+        call_command('loadcsv', CSV_DIR, mode='upsert', stdout=StringIO())
+        untouched = Title.objects.get(id=2)
+        csv_dir = tmp_path / 'data'
+        csv_dir.mkdir()
+        for f_name, change in (
+            ('titles', {'id': '3', 'name': 'Переименованное'}),
+            ('review', {'id': '1', 'score': '1'}),
+        ):
+            with open(os.path.join(CSV_DIR, f'{f_name}.csv'), newline='',
+                      encoding='utf-8') as source:
+                rows = list(csv.DictReader(source))
+            for row in rows:
+                if row['id'] == change['id']:
+                    row.update(change)
+            with open(csv_dir / f'{f_name}.csv', 'w', newline='',
+                      encoding='utf-8') as target:
+                writer = csv.DictWriter(target, fieldnames=rows[0].keys())
+                writer.writeheader()
+                writer.writerows(rows)
+
+        with CaptureQueriesContext(connection) as context:
+            call_command(
+                'loadcsv', str(csv_dir), mode='upsert', stdout=StringIO()
+            )
+        assert not any(
+            query['sql'].strip() == 'DELETE FROM reviews_title_fts'
+            for query in context.captured_queries
+        ), 'Проверьте, что upsert не перестраивает весь поисковый индекс.'
+        assert Title.objects.get(id=2).updated_at == untouched.updated_at, (
+            'Проверьте, что upsert пересчитывает рейтинг только изменившихся '
+            'произведений.'
+        )
+        title = Title.objects.get(id=1)
+        assert title.score_sum == sum(
+            title.reviews.values_list('score', flat=True)
+        )
+        assert Title.objects.get(id=3).updated_at > untouched.updated_at
+        assert search.search_titles(
+            Title.objects.all(), 'Переименованное'
+        ).get().id == 3
+
+    def test_07_import_invalidates_catalog_cache(self, client):
+        url = '/api/v1/genres/'
+        response = client.get(url)
+        assert response.json()['count'] == 0
+        etag = response['ETag']
+        call_command('loadcsv', CSV_DIR, mode='upsert', stdout=StringIO())
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что `loadcsv` сбрасывает версии кэша каталога.'
+        )
+        assert client.get(url).json()['count'] == count_csv_rows('genre')
+
+    def test_08_parallel_upsert_digests_match(self):
+        call_command('loadcsv', CSV_DIR, mode='upsert', workers=3,
+                     stdout=StringIO())
+        with CaptureQueriesContext(connection) as context:
+            call_command('loadcsv', CSV_DIR, mode='upsert', stdout=StringIO())
+        assert not any(
+            query['sql'].startswith(('INSERT', 'UPDATE'))
+            for query in context.captured_queries
+        ), (
+            'Проверьте, что `loadcsv --workers` сохраняет те же хэши строк, '
+            'что и загрузка в одном процессе.'
+        )
+
+    def test_09_parallel_parsing_reports_file_errors(self, tmp_path):
+        csv_dir = tmp_path / 'data'
+        shutil.copytree(CSV_DIR, csv_dir)
+        with open(csv_dir / 'genre.csv', 'a', encoding='utf-8') as target:
+            target.write('\nnot_a_number,Жанр,genre\n')
+        with pytest.raises(CommandError, match='genre.csv'):
+            call_command('loadcsv', str(csv_dir), batch_size=5, workers=2,
+                         stdout=StringIO())
+        assert Title.objects.count() == count_csv_rows('titles'), (
+            'Проверьте, что ошибка в одном файле не останавливает загрузку '
+            'остальных при `--workers`.'
+        )
@@ -0,0 +1,56 @@
+import csv
+import gzip
+import os
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from reviews.management.commands.loadcsv import FILENAME_TO_MODEL_MAP
+from reviews.models import Review, Title
+from tests.test_14_loadcsv import CSV_DIR, count_csv_rows
+
+
+def read_csv(f_path, opener=open):
+    with opener(f_path, 'rt', newline='', encoding='utf-8') as csvfile:
+        return list(csv.DictReader(csvfile))
+
+
+@pytest.mark.django_db(transaction=True)
+class Test15DumpCsv:
+
+    def test_01_dump_can_be_loaded_back(self, tmp_path):
+        call_command('loadcsv', CSV_DIR, stdout=StringIO())
+        review = Review.objects.get(id=1)
+        call_command('dumpcsv', str(tmp_path), chunk_size=3,
+                     stdout=StringIO())
+        for f_name, _ in FILENAME_TO_MODEL_MAP:
+            rows = read_csv(tmp_path / f'{f_name}.csv')
+            assert len(rows) == count_csv_rows(f_name), (
+                f'Проверьте, что команда `dumpcsv` выгружает все строки в '
+                f'файл {f_name}.csv.'
+            )
+        users = read_csv(tmp_path / 'users.csv')
+        assert 'password' not in users[0]
+
+        call_command('flush', interactive=False, verbosity=0)
+        call_command('loadcsv', str(tmp_path), stdout=StringIO())
+        for f_name, model in FILENAME_TO_MODEL_MAP:
+            assert model.objects.count() == count_csv_rows(f_name), (
+                'Проверьте, что файлы `dumpcsv` загружаются командой '
+                '`loadcsv`.'
+            )
+        loaded = Review.objects.get(id=1)
+        assert (loaded.author_id, loaded.title_id, loaded.score) == (
+            review.author_id, review.title_id, review.score
+        )
+        assert Title.objects.get(id=1).rating is not None
+
+    def test_02_gzip_output(self, tmp_path):
+        call_command('loadcsv', CSV_DIR, stdout=StringIO())
+        call_command('dumpcsv', str(tmp_path), gzip=True, stdout=StringIO())
+        assert not os.path.exists(tmp_path / 'titles.csv')
+        rows = read_csv(tmp_path / 'titles.csv.gz', gzip.open)
+        assert len(rows) == count_csv_rows('titles'), (
+            'Проверьте, что `dumpcsv --gzip` выгружает сжатые файлы.'
+        )
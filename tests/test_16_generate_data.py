@@ -0,0 +1,70 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db.models import Count
+
+from reviews.models import Comment, GenreTitle, Review, Title
+from users.models import User
+
+OPTIONS = dict(users=30, categories=3, genres=6, titles=50, reviews=400,
+               comments=300, seed=7, batch_size=64)
+
+
+def snapshot():
+    return (
+        list(Title.objects.order_by('id').values_list(
+            'id', 'year', 'category_id', 'score_sum')),
+        list(GenreTitle.objects.order_by('id').values_list(
+            'title_id', 'genre_id')),
+        list(Review.objects.order_by('id').values_list(
+            'title_id', 'author_id', 'score')),
+        list(Comment.objects.order_by('id').values_list(
+            'review_id', 'author_id')),
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+class Test16GenerateData:
+
+    def test_01_generates_requested_volumes(self):
+        call_command('generate_data', stdout=StringIO(), **OPTIONS)
+        assert User.objects.count() == OPTIONS['users']
+        assert Title.objects.count() == OPTIONS['titles']
+        assert Review.objects.count() == OPTIONS['reviews']
+        assert Comment.objects.count() == OPTIONS['comments']
+        genres = Title.objects.annotate(genres=Count('genre'))
+        assert not genres.filter(genres=0).exists()
+        assert genres.filter(genres__gt=1).exists(), (
+            'Проверьте, что `generate_data` создаёт произведения с '
+            'несколькими жанрами.'
+        )
+        title = Title.objects.order_by('-score_count').first()
+        assert title.rating is not None
+
+    def test_02_title_popularity_is_skewed(self):
+        call_command('generate_data', stdout=StringIO(), **OPTIONS)
+        counts = sorted(
+            Title.objects.values_list('score_count', flat=True), reverse=True
+        )
+        assert counts[0] > 4 * counts[len(counts) // 2], (
+            'Проверьте, что популярность произведений в `generate_data` '
+            'распределена по закону Ципфа.'
+        )
+        assert counts[0] <= OPTIONS['users']
+
+    def test_03_same_seed_gives_same_data(self):
+        call_command('generate_data', stdout=StringIO(), **OPTIONS)
+        first = snapshot()
+        call_command('flush', interactive=False, verbosity=0)
+        call_command('generate_data', stdout=StringIO(), **OPTIONS)
+        assert snapshot() == first, (
+            'Проверьте, что `generate_data` с одинаковым `--seed` создаёт '
+            'одинаковые данные.'
+        )
+
+    def test_04_rejects_more_reviews_than_authors_allow(self):
+        with pytest.raises(CommandError):
+            call_command('generate_data', users=2, titles=2, reviews=5,
+                         stdout=StringIO())
@@ -0,0 +1,103 @@
+import json
+import logging
+import re
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api import timing
+from tests.utils import create_titles
+
+
+@pytest.fixture
+def request_timing(settings):
+    settings.REQUEST_TIMING_ENABLED = True
+    settings.REQUEST_TIMING_SAMPLE_RATE = 1
+
+
+@pytest.fixture
+def measured(monkeypatch):
+    names = []
+    measure = timing.measure
+
+    def counting_measure(name):
+        names.append(name)
+        return measure(name)
+
+    monkeypatch.setattr(timing, 'measure', counting_measure)
+    return names
+
+
+def parse_server_timing(header):
+    metrics = {}
+    for metric in header.split(', '):
+        name, *params = metric.split(';')
+        metrics[name] = dict(param.split('=', 1) for param in params)
+    return metrics
+
+
+@pytest.mark.django_db(transaction=True)
+class Test17RequestTiming:
+
+    def test_01_server_timing_header_and_log(self, request_timing,
+                                             admin_client, caplog):
+        admin_client.post(
+            '/api/v1/genres/', data={'name': 'Драма', 'slug': 'drama'}
+        )
+        with caplog.at_level(logging.INFO, logger='api.timing'):
+            with CaptureQueriesContext(connection) as context:
+                response = admin_client.get('/api/v1/genres/')
+        assert 'Server-Timing' in response, (
+            'Проверьте, что при включённом `REQUEST_TIMING_ENABLED` ответ '
+            'содержит заголовок `Server-Timing`.'
+        )
+        metrics = parse_server_timing(response['Server-Timing'])
+        assert {'db', 'serializer', 'auth', 'total'} <= set(metrics)
+        queries = len(context.captured_queries)
+        assert metrics['db']['desc'] == f'"{queries} queries"', (
+            'Проверьте, что `Server-Timing` содержит число запросов к БД.'
+        )
+        assert re.fullmatch(r'\d+\.\d{2}', metrics['total']['dur'])
+
+        record = json.loads(caplog.records[-1].getMessage())
+        assert record['view'] == 'genres-list'
+        assert record['status'] == 200
+        assert record['queries'] == queries
+        assert record['total_ms'] >= record['db_ms']
+
+    def test_02_disabled_by_default(self, client):
+        response = client.get('/api/v1/genres/')
+        assert 'Server-Timing' not in response, (
+            'Проверьте, что замер времени запросов по умолчанию выключен.'
+        )
+
+    def test_03_sampling(self, request_timing, settings, client):
+        settings.REQUEST_TIMING_SAMPLE_RATE = 0
+        response = client.get('/api/v1/genres/')
+        assert 'Server-Timing' not in response, (
+            'Проверьте, что `REQUEST_TIMING_SAMPLE_RATE` ограничивает долю '
+            'замеряемых запросов.'
+        )
+
+    def test_04_unsampled_serializers_skip_measure(self, admin_client,
+                                                  client, measured):
+        create_titles(admin_client)
+        measured.clear()
+        response = client.get('/api/v1/titles/?limit=100')
+        assert response.status_code == 200
+        assert 'serializer' not in measured, (
+            'Проверьте, что без замера времени сериализаторы не входят в '
+            '`timing.measure`.'
+        )
+
+    def test_05_nested_serializers_measured_once(self, request_timing,
+                                                 admin_client, measured):
+        create_titles(admin_client)
+        measured.clear()
+        response = admin_client.get('/api/v1/titles/?limit=100')
+        titles = response.json()['results']
+        assert measured.count('serializer') == len(titles), (
+            'Проверьте, что вложенные сериализаторы не входят в '
+            '`timing.measure` повторно.'
+        )
@@ -0,0 +1,88 @@
+import multiprocessing
+
+import pytest
+
+from api import metrics
+
+
+@pytest.fixture
+def metrics_dir(settings, tmp_path):
+    settings.METRICS_ENABLED = True
+    settings.METRICS_DIR = str(tmp_path)
+    return tmp_path
+
+
+def parse_metrics(text):
+    samples = {}
+    for line in text.splitlines():
+        if line and not line.startswith('#'):
+            name, value = line.rsplit(' ', 1)
+            samples[name] = float(value)
+    return samples
+
+
+def write_child_metrics():
+    metrics.inc('api_requests_total', route='titles-list', method='GET',
+                status=200)
+    # left behind by a process that is gone
+    metrics.inc('api_requests_in_flight')
+
+
+@pytest.mark.django_db(transaction=True)
+class Test18Metrics:
+
+    def test_01_metrics_endpoint(self, metrics_dir, client):
+        client.get('/api/v1/genres/')
+        client.get('/api/v1/genres/')
+        response = client.get('/metrics')
+        assert response.status_code == 200
+        assert response['Content-Type'].startswith('text/plain')
+        samples = parse_metrics(response.content.decode())
+        assert samples[
+            'api_requests_total{method="GET",route="genres-list",'
+            'status="200"}'
+        ] == 2, (
+            'Проверьте, что `/metrics` считает запросы по маршрутам и '
+            'статусам.'
+        )
+        assert samples[
+            'api_request_duration_seconds_count{method="GET",'
+            'route="genres-list"}'
+        ] == 2
+        assert samples[
+            'api_request_duration_seconds_bucket{le="+Inf",method="GET",'
+            'route="genres-list"}'
+        ] == 2
+        assert samples[
+            'api_db_queries_per_request_count{route="genres-list"}'
+        ] == 2
+        # the second anonymous request is served from the cache
+        assert samples['api_catalog_cache_hit_ratio'] == 0.5
+        # the /metrics request itself is still in flight
+        assert samples['api_requests_in_flight'] == 1
+
+    def test_02_processes_are_aggregated(self, metrics_dir):
+        metrics.inc('api_requests_total', route='titles-list', method='GET',
+                    status=200)
+        process = multiprocessing.get_context('fork').Process(
+            target=write_child_metrics
+        )
+        process.start()
+        process.join()
+        assert len(list(metrics_dir.glob('*.db'))) == 2
+        samples = parse_metrics(metrics.render())
+        assert samples[
+            'api_requests_total{method="GET",route="titles-list",'
+            'status="200"}'
+        ] == 2, (
+            'Проверьте, что `/metrics` суммирует метрики всех процессов.'
+        )
+        assert 'api_requests_in_flight' not in samples, (
+            'Проверьте, что `/metrics` не учитывает показания завершённых '
+            'процессов.'
+        )
+
+    def test_03_disabled_by_default(self, tmp_path, settings, client):
+        settings.METRICS_DIR = str(tmp_path)
+        client.get('/api/v1/genres/')
+        assert not list(tmp_path.glob('*.db'))
@@ -0,0 +1,37 @@
+from http import HTTPStatus
+
+import pytest
+from rest_framework.test import APIClient
+
+
+@pytest.mark.django_db(transaction=True)
+class Test19ApiMiddleware:
+
+    def test_01_api_skips_html_middleware(self, client, admin_client):
+        response = client.get('/api/v1/genres/')
+        assert response.status_code == HTTPStatus.OK
+        assert 'X-Frame-Options' not in response, (
+            'Проверьте, что middleware для html страниц не выполняются для '
+            'запросов к API.'
+        )
+        assert not response.cookies
+        response = admin_client.get('/api/v1/users/')
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что аутентификация по JWT работает без '
+            '`AuthenticationMiddleware`.'
+        )
+
+    def test_02_admin_keeps_sessions_and_csrf(self, client):
+        response = client.get('/admin/login/')
+        assert response.status_code == HTTPStatus.OK
+        assert response['X-Frame-Options'] == 'DENY'
+        assert 'csrftoken' in response.cookies
+
+        csrf_client = APIClient(enforce_csrf_checks=True)
+        response = csrf_client.post(
+            '/admin/login/', {'username': 'admin', 'password': 'admin'},
+            format='multipart',
+        )
+        assert response.status_code == HTTPStatus.FORBIDDEN, (
+            'Проверьте, что CSRF защита админки сохранена.'
+        )
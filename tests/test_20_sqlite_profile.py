@@ -0,0 +1,104 @@
+import threading
+import time
+
+import pytest
+from django.db import OperationalError, connection
+from django.db.backends.sqlite3.base import DatabaseWrapper
+from django.utils.module_loading import import_string
+
+from api.v1 import cache
+from api_yamdb import settings_production
+from reviews.models import Genre
+
+READ_TIMEOUT_MS = 300
+
+
+def open_connection(db_path):
+    # connection_created applies SQLITE_PRAGMAS, as for the default one
+    wrapper = DatabaseWrapper({**connection.settings_dict, 'NAME': db_path})
+    wrapper.ensure_connection()
+    return wrapper
+
+
+def read_during_write(db_path):
+    writer = open_connection(db_path)
+    reader = open_connection(db_path)
+    with writer.cursor() as cursor:
+        cursor.execute('CREATE TABLE review (id integer PRIMARY KEY)')
+        cursor.execute('INSERT INTO review VALUES (1)')
+        # a review being posted: the writer holds the lock until commit
+        cursor.execute('BEGIN EXCLUSIVE')
+        cursor.execute('INSERT INTO review VALUES (2)')
+    result = {}
+    # sqlite connections can't be shared, the reader gets its own thread
+    reader.inc_thread_sharing()
+
+    def read():
+        started = time.perf_counter()
+        try:
+            with reader.cursor() as cursor:
+                cursor.execute('SELECT count(*) FROM review')
+                result['rows'] = cursor.fetchone()[0]
+        except OperationalError as error:
+            result['error'] = error
+        result['seconds'] = time.perf_counter() - started
+
+    thread = threading.Thread(target=read)
+    thread.start()
+    thread.join()
+    with writer.cursor() as cursor:
+        cursor.execute('COMMIT')
+    writer.close()
+    reader.dec_thread_sharing()
+    reader.close()
+    return result
+
+
+@pytest.mark.django_db(transaction=True)
+class Test20SqliteProfile:
+
+    def test_01_readers_stall_behind_writer_without_wal(self, settings,
+                                                        tmp_path):
+        settings.SQLITE_PRAGMAS = {'busy_timeout': READ_TIMEOUT_MS}
+        result = read_during_write(str(tmp_path / 'db.sqlite3'))
+        assert 'error' in result
+        assert result['seconds'] >= READ_TIMEOUT_MS / 1000 * 0.9
+
+    def test_02_wal_readers_do_not_wait_for_writer(self, settings,
+                                                   tmp_path):
+        settings.SQLITE_PRAGMAS = {
+            **settings_production.SQLITE_PRAGMAS,
+            'busy_timeout': READ_TIMEOUT_MS,
+        }
+        result = read_during_write(str(tmp_path / 'db.sqlite3'))
+        assert result.get('rows') == 1, (
+            'Проверьте, что в режиме WAL чтение не ждёт завершения записи и '
+            'видит последний зафиксированный снимок.'
+        )
+        assert result['seconds'] < READ_TIMEOUT_MS / 1000 / 2
+
+    def test_03_profile_enables_persistent_connections(self):
+        assert settings_production.DATABASES['default']['CONN_MAX_AGE'] > 0
+        assert not connection.settings_dict.get('CONN_MAX_AGE'), (
+            'Проверьте, что профиль не меняет настройки по умолчанию.'
+        )
+
+    def test_04_catalog_versions_are_shared(self, tmp_path, monkeypatch):
+        params = settings_production.CACHES['catalog']
+        # locmem caches of one name are shared inside a process only
+        assert 'locmem' not in params['BACKEND']
+        backend = import_string(params['BACKEND'])
+        # two worker processes with their own cache objects
+        workers = [
+            backend(str(tmp_path), params.get('OPTIONS', {}))
+            for _ in range(2)
+        ]
+        monkeypatch.setattr(cache, 'get_cache', lambda: workers[1])
+        before = cache.get_versions((Genre,))
+        monkeypatch.setattr(cache, 'get_cache', lambda: workers[0])
+        cache.bump_version(Genre)
+        monkeypatch.setattr(cache, 'get_cache', lambda: workers[1])
+        assert cache.get_versions((Genre,)) != before, (
+            'Проверьте, что в профиле для продакшена версии кэша каталога '
+            'общие для всех процессов сервера.'
+        )
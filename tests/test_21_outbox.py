@@ -0,0 +1,152 @@
+from http import HTTPStatus
+from io import StringIO
+
+import pytest
+from django.core import mail
+from django.core.mail.backends.base import BaseEmailBackend
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.utils import timezone
+
+from users.management.commands.sendoutbox import claim_due_emails
+from users.models import OutgoingEmail
+
+
+class FailingBackend(BaseEmailBackend):
+    def send_messages(self, email_messages):
+        raise ConnectionError('Почтовый сервер недоступен')
+
+
+class CrashingBackend(EmailBackend):
+    # the worker dies after the first email of the batch
+    def send_messages(self, email_messages):
+        if mail.outbox:
+            raise SystemExit('Процесс остановлен')
+        return super().send_messages(email_messages)
+
+
+class CountingBackend(EmailBackend):
+    opened = 0
+
+    def open(self):
+        CountingBackend.opened += 1
+        return super().open()
+
+
+def queue_emails(count):
+    OutgoingEmail.objects.bulk_create(
+        OutgoingEmail(subject='Тема', message='Текст',
+                      from_email='admin@yamdb.com',
+                      recipient=f'user{idx}@yamdb.fake')
+        for idx in range(count)
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+class Test21Outbox:
+
+    def test_01_signup_queues_confirmation_email(self, client):
+        response = client.post(
+            '/api/v1/auth/signup/',
+            data={'username': 'new_user', 'email': 'new_user@yamdb.fake'},
+        )
+        assert response.status_code == HTTPStatus.OK
+        assert not mail.outbox, (
+            'Проверьте, что регистрация не отправляет письмо синхронно.'
+        )
+        email = OutgoingEmail.objects.get()
+        assert email.recipient == 'new_user@yamdb.fake'
+        assert email.sent_at is None
+
+        call_command('sendoutbox', stdout=StringIO())
+        assert len(mail.outbox) == 1
+        assert mail.outbox[0].to == ['new_user@yamdb.fake']
+        email.refresh_from_db()
+        assert email.sent_at is not None
+
+        call_command('sendoutbox', stdout=StringIO())
+        assert len(mail.outbox) == 1, (
+            'Проверьте, что `sendoutbox` не отправляет письма повторно.'
+        )
+
+    def test_02_one_connection_per_batch(self, settings):
+        settings.EMAIL_BACKEND = 'tests.test_21_outbox.CountingBackend'
+        CountingBackend.opened = 0
+        queue_emails(5)
+        call_command('sendoutbox', batch_size=2, stdout=StringIO())
+        assert len(mail.outbox) == 5
+        assert CountingBackend.opened == 3, (
+            'Проверьте, что `sendoutbox` открывает одно соединение с '
+            'почтовым сервером на пакет писем.'
+        )
+
+    def test_03_failed_emails_are_retried_with_backoff(self, settings):
+        settings.EMAIL_BACKEND = 'tests.test_21_outbox.FailingBackend'
+        queue_emails(1)
+        started = timezone.now()
+        call_command('sendoutbox', backoff=60, stdout=StringIO())
+        email = OutgoingEmail.objects.get()
+        assert email.attempts == 1
+        assert email.sent_at is None
+        assert 'недоступен' in email.last_error
+        assert email.send_after >= started + timezone.timedelta(seconds=60)
+
+        call_command('sendoutbox', backoff=60, stdout=StringIO())
+        email.refresh_from_db()
+        assert email.attempts == 1, (
+            'Проверьте, что `sendoutbox` не повторяет отправку до окончания '
+            'паузы.'
+        )
+
+        OutgoingEmail.objects.update(send_after=timezone.now())
+        call_command('sendoutbox', backoff=0, max_attempts=3,
+                     stdout=StringIO())
+        email.refresh_from_db()
+        assert email.attempts == 3, (
+            'Проверьте, что `sendoutbox` прекращает попытки после '
+            '`--max-attempts`.'
+        )
+
+        settings.EMAIL_BACKEND = (
+            'django.core.mail.backends.locmem.EmailBackend'
+        )
+        call_command('sendoutbox', max_attempts=3, stdout=StringIO())
+        assert not mail.outbox
+
+    def test_04_concurrent_runs_claim_separate_batches(self):
+        queue_emails(5)
+        first = claim_due_emails(3, max_attempts=5, lease=300)
+        second = claim_due_emails(3, max_attempts=5, lease=300)
+        assert len(first) == 3
+        assert len(second) == 2
+        assert not {email.pk for email in first} & {
+            email.pk for email in second
+        }, 'Проверьте, что два процесса `sendoutbox` не получают одно письмо.'
+        assert claim_due_emails(3, max_attempts=5, lease=300) == []
+
+    def test_05_crash_keeps_sent_emails(self, settings):
+        settings.EMAIL_BACKEND = 'tests.test_21_outbox.CrashingBackend'
+        queue_emails(2)
+        with pytest.raises(SystemExit):
+            call_command('sendoutbox', lease=300, stdout=StringIO())
+        assert len(mail.outbox) == 1
+        sent = OutgoingEmail.objects.filter(sent_at__isnull=False)
+        assert sent.count() == 1, (
+            'Проверьте, что `sendoutbox` сохраняет отправку каждого письма '
+            'сразу после неё.'
+        )
+
+        settings.EMAIL_BACKEND = (
+            'django.core.mail.backends.locmem.EmailBackend'
+        )
+        call_command('sendoutbox', stdout=StringIO())
+        assert len(mail.outbox) == 1, (
+            'Проверьте, что письма упавшего процесса не отправляются до '
+            'окончания `--lease`.'
+        )
+        OutgoingEmail.objects.filter(sent_at__isnull=True).update(
+            send_after=timezone.now()
+        )
+        call_command('sendoutbox', stdout=StringIO())
+        assert len(mail.outbox) == 2
+        assert not OutgoingEmail.objects.filter(sent_at__isnull=True).exists()
@@ -0,0 +1,68 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+def count_user_queries(context):
+    return sum(
+        'FROM "users_user"' in query['sql']
+        for query in context.captured_queries
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+class Test22UserCache:
+
+    def test_01_user_is_loaded_once(self, user_client):
+        with CaptureQueriesContext(connection) as context:
+            assert user_client.get('/api/v1/users/me/').status_code == (
+                HTTPStatus.OK
+            )
+        assert count_user_queries(context) == 1
+        with CaptureQueriesContext(connection) as context:
+            response = user_client.get('/api/v1/users/me/')
+        assert response.status_code == HTTPStatus.OK
+        assert count_user_queries(context) == 0, (
+            'Проверьте, что пользователь из JWT загружается из кэша, а не '
+            'из базы на каждый запрос.'
+        )
+
+    def test_02_role_change_invalidates_cache(self, user_client, user,
+                                              admin_client):
+        assert user_client.get('/api/v1/users/').status_code == (
+            HTTPStatus.FORBIDDEN
+        )
+        response = admin_client.patch(
+            f'/api/v1/users/{user.username}/', data={'role': 'admin'}
+        )
+        assert response.status_code == HTTPStatus.OK
+        assert user_client.get('/api/v1/users/').status_code == (
+            HTTPStatus.OK
+        ), (
+            'Проверьте, что изменение роли пользователя сбрасывает его '
+            'запись в кэше.'
+        )
+
+    def test_03_profile_change_and_deactivation(self, user_client, user):
+        user_client.get('/api/v1/users/me/')
+        response = user_client.patch(
+            '/api/v1/users/me/', data={'bio': 'Новое описание'}
+        )
+        assert response.status_code == HTTPStatus.OK
+        assert user_client.get('/api/v1/users/me/').json()['bio'] == (
+            'Новое описание'
+        )
+        user.is_active = False
+        user.save()
+        assert user_client.get('/api/v1/users/me/').status_code == (
+            HTTPStatus.UNAUTHORIZED
+        ), 'Проверьте, что отключённый пользователь не берётся из кэша.'
+
+    def test_04_cache_can_be_disabled(self, settings, user_client):
+        settings.USER_CACHE_TIMEOUT = 0
+        user_client.get('/api/v1/users/me/')
+        with CaptureQueriesContext(connection) as context:
+            user_client.get('/api/v1/users/me/')
+        assert count_user_queries(context) == 1
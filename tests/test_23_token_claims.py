@@ -0,0 +1,146 @@
+from http import HTTPStatus
+
+import pytest
+from django.contrib.auth.tokens import default_token_generator
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import UntypedToken
+
+from api.v1.authentication import AccessToken, user_cache
+from reviews.models import Review, Title
+
+
+def get_client(user):
+    client = APIClient()
+    client.credentials(
+        HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}'
+    )
+    return client
+
+
+def count_user_queries(context):
+    return sum(
+        'FROM "users_user"' in query['sql']
+        for query in context.captured_queries
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+class Test23TokenClaims:
+
+    def test_01_token_has_role_claims(self, client, moderator):
+        response = client.post(
+            '/api/v1/auth/token/',
+            data={
+                'username': moderator.username,
+                'confirmation_code': default_token_generator.make_token(
+                    moderator
+                ),
+            },
+        )
+        assert response.status_code == HTTPStatus.OK
+        token = UntypedToken(response.json()['token'])
+        assert token['role'] == 'moderator'
+        assert token['is_superuser'] is False
+        assert token['token_version'] == 0, (
+            'Проверьте, что токен содержит роль пользователя и версию токенов.'
+        )
+
+    def test_02_permissions_use_claims(self, admin, monkeypatch):
+        client = get_client(admin)
+        assert client.get('/api/v1/users/me/').status_code == HTTPStatus.OK
+
+        def load_user(*args):
+            raise AssertionError('Пользователь не должен загружаться.')
+
+        monkeypatch.setattr(user_cache, 'get', load_user)
+        with CaptureQueriesContext(connection) as context:
+            response = client.post(
+                '/api/v1/genres/', data={'name': 'Жанр', 'slug': 'genre'}
+            )
+        assert response.status_code == HTTPStatus.CREATED
+        assert count_user_queries(context) == 0, (
+            'Проверьте, что права администратора проверяются по токену, без '
+            'запросов к таблице пользователей.'
+        )
+
+    def test_03_role_change_revokes_tokens(self, admin_client, moderator):
+        client = get_client(moderator)
+        assert client.get('/api/v1/users/me/').status_code == HTTPStatus.OK
+        response = admin_client.patch(
+            f'/api/v1/users/{moderator.username}/', data={'role': 'admin'}
+        )
+        assert response.status_code == HTTPStatus.OK
+        assert client.get('/api/v1/users/').status_code == (
+            HTTPStatus.UNAUTHORIZED
+        ), 'Проверьте, что изменение роли отзывает выданные токены.'
+        moderator.refresh_from_db()
+        assert moderator.token_version == 1
+        assert get_client(moderator).get('/api/v1/users/').status_code == (
+            HTTPStatus.OK
+        )
+
+    def test_04_superuser_change_revokes_tokens(self, user):
+        client = get_client(user)
+        user.is_superuser = True
+        user.save(update_fields=('is_superuser',))
+        assert client.get('/api/v1/users/me/').status_code == (
+            HTTPStatus.UNAUTHORIZED
+        )
+        user.refresh_from_db()
+        assert user.token_version == 1
+
+    def test_05_profile_change_keeps_tokens(self, user):
+        client = get_client(user)
+        response = client.patch(
+            '/api/v1/users/me/', data={'bio': 'Новое описание'}
+        )
+        assert response.status_code == HTTPStatus.OK
+        assert response.json()['role'] == 'user'
+        assert client.get('/api/v1/users/me/').json()['bio'] == (
+            'Новое описание'
+        )
+
+    def test_06_lazy_user_in_views(self, user, moderator):
+        client = get_client(user)
+        client.get('/api/v1/users/me/')
+        response = client.get('/api/v1/users/me/')
+        assert response.status_code == HTTPStatus.OK
+        assert response.json()['username'] == user.username
+        assert get_client(moderator).get('/api/v1/users/').status_code == (
+            HTTPStatus.FORBIDDEN
+        )
+
+    def test_07_moderation_with_claims(self, user, moderator):
+        title = Title.objects.create(name='Произведение', year=2000)
+        user_client = get_client(user)
+        user_client.get('/api/v1/users/me/')
+        response = user_client.post(
+            f'/api/v1/titles/{title.id}/reviews/',
+            data={'text': 'Отзыв', 'score': 5},
+        )
+        assert response.status_code == HTTPStatus.CREATED
+        review_id = response.json()['id']
+        assert Review.objects.get(id=review_id).author == user
+        response = get_client(moderator).delete(
+            f'/api/v1/titles/{title.id}/reviews/{review_id}/'
+        )
+        assert response.status_code == HTTPStatus.NO_CONTENT, (
+            'Проверьте, что модератор может удалить чужой отзыв с токеном, '
+            'содержащим роль.'
+        )
+
+    def test_08_bulk_role_change_revokes_tokens(self, admin):
+        client = get_client(admin)
+        assert client.get('/api/v1/users/').status_code == HTTPStatus.OK
+        # bulk updates skip `save()` and keep the token version
+        type(admin).objects.filter(pk=admin.pk).update(role='user')
+        user_cache.clear()
+        for _ in range(3):
+            assert client.get('/api/v1/users/').status_code == (
+                HTTPStatus.UNAUTHORIZED
+            ), (
+                'Проверьте, что токен с ролью, которая не совпадает с ролью '
+                'пользователя в базе, отклоняется.'
+            )
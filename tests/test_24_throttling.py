@@ -0,0 +1,128 @@
+from http import HTTPStatus
+
+import pytest
+
+from api import metrics
+from api.v1 import throttling
+
+
+@pytest.fixture
+def now(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(throttling.time, 'time', lambda: clock[0])
+    return clock
+
+
+@pytest.fixture(params=('memory', 'sqlite', 'cache'))
+def store(request, tmp_path):
+    if request.param == 'memory':
+        return throttling.MemoryBucketStore(10)
+    if request.param == 'sqlite':
+        return throttling.SqliteBucketStore(tmp_path / 'throttle.sqlite3')
+    store = throttling.CacheBucketStore('throttle')
+    store.clear()
+    return store
+
+
+@pytest.mark.django_db(transaction=True)
+class Test24Throttling:
+    url_signup = '/api/v1/auth/signup/'
+    url_token = '/api/v1/auth/token/'
+
+    def test_01_token_bucket(self, store, now):
+        assert store.take('key', 2, 0.5) == 0
+        assert store.take('key', 2, 0.5) == 0
+        assert store.take('key', 2, 0.5) == pytest.approx(2), (
+            'Проверьте, что пустая корзина возвращает время ожидания токена.'
+        )
+        assert store.take('other', 2, 0.5) == 0
+        now[0] += 2
+        assert store.take('key', 2, 0.5) == 0
+        assert store.take('key', 2, 0.5) > 0
+        now[0] += 100
+        # refilled up to the capacity only
+        assert store.take('key', 2, 0.5) == 0
+        assert store.take('key', 2, 0.5) == 0
+        assert store.take('key', 2, 0.5) > 0
+        store.clear()
+        assert store.take('key', 2, 0.5) == 0
+
+    def test_02_memory_store_size(self, now):
+        store = throttling.MemoryBucketStore(2)
+        store.take('first', 1, 1)
+        store.take('second', 1, 1)
+        store.take('third', 1, 1)
+        assert list(store.buckets) == ['second', 'third']
+
+    def test_03_ip_throttle(self, client, monkeypatch, settings, tmp_path,
+                            now):
+        settings.METRICS_ENABLED = True
+        settings.METRICS_DIR = str(tmp_path)
+        monkeypatch.setitem(
+            throttling.AuthIpThrottle.THROTTLE_RATES, 'auth_ip', '3/min'
+        )
+        for idx in range(3):
+            response = client.post(
+                self.url_signup, data={'username': f'user{idx}'}
+            )
+            assert response.status_code == HTTPStatus.BAD_REQUEST
+        response = client.post(self.url_token, data={'username': 'user'})
+        assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS, (
+            'Проверьте, что запросы к `/api/v1/auth/` с одного IP '
+            'ограничиваются.'
+        )
+        assert response['Retry-After'] == '20'
+        response = client.post(
+            self.url_signup, data={}, REMOTE_ADDR='10.0.0.2'
+        )
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        now[0] += 20
+        response = client.post(self.url_signup, data={})
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        samples = metrics.collect()
+        key = ('api_throttled_requests_total', (('scope', 'auth_ip'),))
+        assert samples[key] == 1
+
+    def test_04_username_throttle(self, client, monkeypatch, now):
+        monkeypatch.setitem(
+            throttling.AuthUsernameThrottle.THROTTLE_RATES,
+            'auth_username',
+            '2/min',
+        )
+        data = {'username': 'TestUser', 'confirmation_code': 'wrong'}
+        for idx in range(2):
+            response = client.post(
+                self.url_token, data=data, REMOTE_ADDR=f'10.0.0.{idx}'
+            )
+            assert response.status_code == HTTPStatus.NOT_FOUND
+        response = client.post(
+            self.url_signup,
+            data={'username': 'testuser'},
+            REMOTE_ADDR='10.0.0.9',
+        )
+        assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS, (
+            'Проверьте, что запросы к `/api/v1/auth/` с одним `username` '
+            'ограничиваются независимо от IP.'
+        )
+        assert response['Retry-After'] == '30'
+        response = client.post(
+            self.url_token, data={**data, 'username': 'OtherUser'}
+        )
+        assert response.status_code == HTTPStatus.NOT_FOUND
+
+    def test_05_forwarded_for_is_ignored(self, client, monkeypatch):
+        monkeypatch.setitem(
+            throttling.AuthIpThrottle.THROTTLE_RATES, 'auth_ip', '3/min'
+        )
+        statuses = [
+            client.post(
+                self.url_signup,
+                data={},
+                HTTP_X_FORWARDED_FOR=f'10.0.1.{idx}',
+            ).status_code
+            for idx in range(5)
+        ]
+        assert statuses.count(HTTPStatus.TOO_MANY_REQUESTS) == 2, (
+            'Проверьте, что IP клиента не берётся из заголовка '
+            '`X-Forwarded-For`, если сервер не стоит за прокси.'
+        )